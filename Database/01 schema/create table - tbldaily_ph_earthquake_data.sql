@@ -1,20 +1,59 @@
 
 -- drop table if exists public.tbldaily_ph_earthquake_data
 
+create extension if not exists postgis;
+
 
 create table public.tbldaily_ph_earthquake_data (
+    event_id varchar primary key,
+    origin_time timestamptz,
     date date,
     time time,
     geo_lat double precision,
     geo_long double precision,
-    geo_point varchar,
+    geo_point geometry(Point, 4326),
     location varchar,
+    ref_distance_km real,
+    ref_bearing_deg real,
+    municipality varchar,
+    province varchar,
     depth_km double precision,
     magnitude double precision,
     info_no int,
+    event_datetime timestamp,
     depth_of_focus_km int,
     origin varchar,
+    magnitude_type varchar,
     expecting_damage varchar,
     expecting_aftershocks varchar,
-    page_link varchar
-)
\ No newline at end of file
+    issued_on timestamp,
+    page_link varchar,
+    page_hash char(64)  -- sha256 of the raw bulletin page in the bulletin archive (modules.BulletinArchive)
+);
+
+
+-- spatial indexes: bounding box queries (&&) use the geometry, distance queries (ST_DWithin, <->) the geography in meters
+create index if not exists ix_tbldaily_ph_earthquake_data_geo_point
+    on public.tbldaily_ph_earthquake_data using gist (geo_point);
+create index if not exists ix_tbldaily_ph_earthquake_data_geo_point_geog
+    on public.tbldaily_ph_earthquake_data using gist ((geo_point::geography));
+
+-- province level rollups and filters
+create index if not exists ix_tbldaily_ph_earthquake_data_province
+    on public.tbldaily_ph_earthquake_data (province, municipality);
+
+-- filters and orderings of DBConnect.DatabaseExtractor.get_events(): each index ends with event_id, the tie breaker
+-- of the keyset pagination, so "(column, event_id) > (:after_value, :after_event_id) order by column, event_id" is a
+-- single index range scan (in either direction)
+create index if not exists ix_tbldaily_ph_earthquake_data_origin_time
+    on public.tbldaily_ph_earthquake_data (origin_time, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_province_time
+    on public.tbldaily_ph_earthquake_data (province, origin_time, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_magnitude
+    on public.tbldaily_ph_earthquake_data (magnitude, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_depth
+    on public.tbldaily_ph_earthquake_data (depth_km, event_id);
+
+
+
+-- existing databases: see 03 migrations/001 - upgrade event tables.sql
@@ -0,0 +1,34 @@
+-- drop table if exists public.tbldaily_ph_earthquake_intensity
+
+
+-- one row per event, intensity source and town, parsed from the bulletins by modules.IntensityParser
+-- loaded by main.dump_to_database (COPY), the rows of an event are replaced whenever its bulletin is reloaded
+create table public.tbldaily_ph_earthquake_intensity (
+    event_id varchar not null,
+    intensity smallint not null,
+    municipality varchar not null,
+    province varchar,
+    source varchar not null     -- 'reported' or 'instrumental'
+);
+
+
+-- "which towns felt intensity >= IV": range scan on intensity, then join to the events
+create index if not exists ix_tbldaily_ph_earthquake_intensity_intensity
+    on public.tbldaily_ph_earthquake_intensity (intensity, event_id);
+-- all intensities of an event (and the delete before a reload)
+create index if not exists ix_tbldaily_ph_earthquake_intensity_event_id
+    on public.tbldaily_ph_earthquake_intensity (event_id);
+-- history of a town
+create index if not exists ix_tbldaily_ph_earthquake_intensity_place
+    on public.tbldaily_ph_earthquake_intensity (province, municipality);
+
+
+/*
+    select i.province, i.municipality, max(i.intensity) as max_intensity, count(distinct i.event_id) as events
+    from public.tbldaily_ph_earthquake_intensity i
+    join public.tbldaily_ph_earthquake_data e on e.event_id = i.event_id
+    where i.intensity >= 4
+        and e.origin_time >= date_trunc('year', now())
+    group by 1, 2
+    order by 3 desc, 4 desc
+*/
@@ -0,0 +1,81 @@
+-- drop table if exists public.tbldaily_ph_earthquake_rollup_daily
+-- drop table if exists public.tbldaily_ph_earthquake_rollup_monthly
+
+
+-- pre-aggregated event counts for the dashboard (VizApp.pbix), per day / month, province, magnitude band and depth band
+-- kept up to date by public.sp_refresh_ph_eq_rollups(), which public.sp_insert_ph_eq_data() calls for the days it changed
+-- averages are sum_* / event_count, so they can be re-aggregated over any grouping
+
+
+-- magnitude bands: '< 2.0', '2.0-2.9', '3.0-3.9', '4.0-4.9', '5.0-5.9', '6.0+'
+create or replace function public.fn_ph_eq_magnitude_band(magnitude double precision)
+returns varchar
+language sql immutable
+as $$
+    select case
+        when magnitude is null then 'unknown'
+        when magnitude < 2 then '< 2.0'
+        when magnitude < 3 then '2.0-2.9'
+        when magnitude < 4 then '3.0-3.9'
+        when magnitude < 5 then '4.0-4.9'
+        when magnitude < 6 then '5.0-5.9'
+        else '6.0+'
+    end
+$$;
+
+-- depth bands: shallow (< 70 km), intermediate (70-300 km), deep (>= 300 km)
+create or replace function public.fn_ph_eq_depth_band(depth_km double precision)
+returns varchar
+language sql immutable
+as $$
+    select case
+        when depth_km is null then 'unknown'
+        when depth_km < 70 then 'shallow'
+        when depth_km < 300 then 'intermediate'
+        else 'deep'
+    end
+$$;
+
+
+create table public.tbldaily_ph_earthquake_rollup_daily (
+    day date not null,
+    province varchar not null,              -- 'Unknown' when the location has no province
+    magnitude_band varchar not null,
+    depth_band varchar not null,
+    event_count int not null,
+    max_magnitude double precision,
+    sum_magnitude numeric,                  -- numeric: exact sums, whatever order the rows are added in
+    sum_depth_km numeric,
+    refreshed_at timestamptz not null default now(),
+    primary key (day, province, magnitude_band, depth_band)
+);
+
+create table public.tbldaily_ph_earthquake_rollup_monthly (
+    month date not null,                    -- first day of the month
+    province varchar not null,
+    magnitude_band varchar not null,
+    depth_band varchar not null,
+    event_count int not null,
+    max_magnitude double precision,
+    sum_magnitude numeric,
+    sum_depth_km numeric,
+    refreshed_at timestamptz not null default now(),
+    primary key (month, province, magnitude_band, depth_band)
+);
+
+
+-- the rollups of a day are recomputed from the events of that day
+create index if not exists ix_tbldaily_ph_earthquake_data_date
+    on public.tbldaily_ph_earthquake_data (date);
+
+
+/*
+    -- first fill (or full rebuild) of the rollups
+    call public.sp_refresh_ph_eq_rollups(null)
+
+    select month, province, sum(event_count) as events, max(max_magnitude) as max_magnitude
+    from public.tbldaily_ph_earthquake_rollup_monthly
+    where month >= date_trunc('year', now())
+    group by 1, 2
+    order by 1, 3 desc
+*/
@@ -12,46 +12,113 @@
 CREATE OR REPLACE PROCEDURE public.sp_insert_ph_eq_data()
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    v_days date[];
 BEGIN
 
+    -- days whose rollups change (public.sp_refresh_ph_eq_rollups): the day of every new event, and the old and new
+    -- day of every event whose time, province, magnitude or depth is revised
+    v_days := array(
+        select distinct days.day
+        from raw.tbldaily_earthquake_data r
+        left join public.tbldaily_ph_earthquake_data c on c.event_id = r.event_id
+        cross join lateral unnest(array[(r.origin_time at time zone 'Asia/Manila')::date, c.date]) as days(day)
+        where days.day is not null
+            and (
+                c.event_id is null
+                or (r.origin_time, r.province::varchar, round(r.magnitude::numeric, 2)::double precision, round(r.depth_km::numeric, 2)::double precision)
+                    is distinct from (c.origin_time, c.province, c.magnitude, c.depth_km)
+            )
+    );
+
     insert into public.tbldaily_ph_earthquake_data (
+        event_id,
+        origin_time,
         date,
         time,
         geo_lat,
         geo_long,
         geo_point,
         location,
+        ref_distance_km,
+        ref_bearing_deg,
+        municipality,
+        province,
         depth_km,
         magnitude,
         info_no,
+        event_datetime,
         depth_of_focus_km,
         origin,
+        magnitude_type,
         expecting_damage,
         expecting_aftershocks,
-        page_link
+        issued_on,
+        page_link,
+        page_hash
     )
     select 
-        date::date as date,
-        time::time as time,
-        latitude as lat,
-        longitude as long,
-        '[' || longitude || ',' || latitude || ']' point,
+        event_id,
+        -- main.clean_summary_data keeps a single Asia/Manila origin timestamp, the local date and time come from it
+        -- (raw rows loaded before origin_time existed get it from 03 migrations/001 - upgrade event tables.sql)
+        origin_time,
+        (origin_time at time zone 'Asia/Manila')::date as date,
+        (origin_time at time zone 'Asia/Manila')::time as time,
+        -- raw keeps the compact float32 (real) values, round them back to the published precision
+        round(latitude::numeric, 4)::double precision as lat,
+        round(longitude::numeric, 4)::double precision as long,
+        ST_SetSRID(ST_MakePoint(round(longitude::numeric, 4)::double precision, round(latitude::numeric, 4)::double precision), 4326) as point,
         location,
-        depth_km,
-        magnitude,
-        substring(details FROM position('EARTHQUAKE INFORMATION NO. :' IN details) + length('EARTHQUAKE INFORMATION NO. :') FOR 
-                position(' PHIVOLCS Building' IN details) - position('EARTHQUAKE INFORMATION NO. :' IN details) - length('EARTHQUAKE INFORMATION NO. :'))::int as info_no,
-        substring(details FROM position('Depth of Focus (Km) :' IN details) + length('Depth of Focus (Km) :') FOR 
-                position(' Origin' IN details) - position('Depth of Focus (Km) :' IN details) - length('Depth of Focus (Km) :'))::int as depth_of_focus_km,
-        substring(details FROM position('Origin : ' IN details) + length('Origin : ') FOR 
-                position(' Magnitude' IN details) - position('Origin : ' IN details) - length('Origin : ')) as origin,
-        substring(details FROM position('Expecting Damage : ' IN details) + length('Expecting Damage : ') FOR 
-                position(' Expecting Aftershocks' IN details) - position('Expecting Damage : ' IN details) - length('Expecting Damage : ')) as expecting_damage,
-        substring(details FROM position('Expecting Aftershocks : ' IN details) + length('Expecting Aftershocks : ') FOR 
-                position(' Issued On' IN details) - position('Expecting Aftershocks : ' IN details) - length('Expecting Aftershocks : ')) as expecting_aftershock,
-        hlink
+        -- parts of the location, split by main.clean_summary_data (modules.LocationParser)
+        ref_distance_km,
+        ref_bearing_deg,
+        municipality,
+        province,
+        round(depth_km::numeric, 2)::double precision as depth_km,
+        round(magnitude::numeric, 2)::double precision as magnitude,
+        -- bulletin fields are already extracted by main.parse_detail_data (modules.BulletinParser)
+        info_no,
+        event_datetime,
+        depth_of_focus_km,
+        origin,
+        magnitude_type,
+        expecting_damage,
+        expecting_aftershocks,
+        issued_on,
+        hlink,
+        -- the bulletin text itself stays in the bulletin archive, under this hash
+        page_hash
     from raw.tbldaily_earthquake_data
-    order by 1, 2;
+    order by 2, 3
+    -- raw is loaded incrementally (main.dump_to_database), so only new or revised events change here
+    on conflict (event_id) do update set
+        origin_time = excluded.origin_time,
+        date = excluded.date,
+        time = excluded.time,
+        geo_lat = excluded.geo_lat,
+        geo_long = excluded.geo_long,
+        geo_point = excluded.geo_point,
+        location = excluded.location,
+        ref_distance_km = excluded.ref_distance_km,
+        ref_bearing_deg = excluded.ref_bearing_deg,
+        municipality = excluded.municipality,
+        province = excluded.province,
+        depth_km = excluded.depth_km,
+        magnitude = excluded.magnitude,
+        -- a row whose bulletin could not be fetched (or a historical row without one) keeps the curated bulletin fields
+        info_no = coalesce(excluded.info_no, public.tbldaily_ph_earthquake_data.info_no),
+        event_datetime = coalesce(excluded.event_datetime, public.tbldaily_ph_earthquake_data.event_datetime),
+        depth_of_focus_km = coalesce(excluded.depth_of_focus_km, public.tbldaily_ph_earthquake_data.depth_of_focus_km),
+        origin = coalesce(excluded.origin, public.tbldaily_ph_earthquake_data.origin),
+        magnitude_type = coalesce(excluded.magnitude_type, public.tbldaily_ph_earthquake_data.magnitude_type),
+        expecting_damage = coalesce(excluded.expecting_damage, public.tbldaily_ph_earthquake_data.expecting_damage),
+        expecting_aftershocks = coalesce(excluded.expecting_aftershocks, public.tbldaily_ph_earthquake_data.expecting_aftershocks),
+        issued_on = coalesce(excluded.issued_on, public.tbldaily_ph_earthquake_data.issued_on),
+        page_link = excluded.page_link,
+        page_hash = coalesce(excluded.page_hash, public.tbldaily_ph_earthquake_data.page_hash)
+    where (public.tbldaily_ph_earthquake_data.*) is distinct from (excluded.*);
+
+    call public.sp_refresh_ph_eq_rollups(v_days);
 
 
     EXCEPTION
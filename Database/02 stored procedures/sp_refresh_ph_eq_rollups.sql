@@ -0,0 +1,93 @@
+/*
+    call public.sp_refresh_ph_eq_rollups(array['2024-10-01', '2024-10-02']::date[])
+
+    -- rebuild every day
+    call public.sp_refresh_ph_eq_rollups(null)
+
+    select *
+    from public.tbldaily_ph_earthquake_rollup_daily
+
+
+*/
+
+-- public.sp_refresh_ph_eq_rollups(date[])
+
+CREATE OR REPLACE PROCEDURE public.sp_refresh_ph_eq_rollups(p_days date[])
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_months date[];
+BEGIN
+
+    if p_days is null then
+        p_days := array(select distinct date from public.tbldaily_ph_earthquake_data where date is not null);
+    end if;
+    if cardinality(p_days) = 0 then
+        return;
+    end if;
+
+    -- only the given days are recomputed, from the events of those days (index on date)
+    delete from public.tbldaily_ph_earthquake_rollup_daily
+    where day = any(p_days);
+
+    insert into public.tbldaily_ph_earthquake_rollup_daily (
+        day,
+        province,
+        magnitude_band,
+        depth_band,
+        event_count,
+        max_magnitude,
+        sum_magnitude,
+        sum_depth_km
+    )
+    select
+        date,
+        coalesce(province, 'Unknown'),
+        public.fn_ph_eq_magnitude_band(magnitude),
+        public.fn_ph_eq_depth_band(depth_km),
+        count(*),
+        max(magnitude),
+        sum(magnitude::numeric),
+        sum(depth_km::numeric)
+    from public.tbldaily_ph_earthquake_data
+    where date = any(p_days)
+    group by 1, 2, 3, 4;
+
+    -- the months of those days are re-aggregated from the daily rollups, not from the events
+    v_months := array(select distinct date_trunc('month', day)::date from unnest(p_days) as days(day));
+
+    delete from public.tbldaily_ph_earthquake_rollup_monthly
+    where month = any(v_months);
+
+    insert into public.tbldaily_ph_earthquake_rollup_monthly (
+        month,
+        province,
+        magnitude_band,
+        depth_band,
+        event_count,
+        max_magnitude,
+        sum_magnitude,
+        sum_depth_km
+    )
+    select
+        date_trunc('month', day)::date,
+        province,
+        magnitude_band,
+        depth_band,
+        sum(event_count),
+        max(max_magnitude),
+        sum(sum_magnitude),
+        sum(sum_depth_km)
+    from public.tbldaily_ph_earthquake_rollup_daily
+    where day >= (select min(month) from unnest(v_months) as months(month))
+        and day < (select max(month) from unnest(v_months) as months(month)) + interval '1 month'
+        and date_trunc('month', day)::date = any(v_months)
+    group by 1, 2, 3, 4;
+
+
+    EXCEPTION
+    WHEN OTHERS THEN
+	RAISE EXCEPTION 'An error occurred: %', SQLERRM;
+
+END;
+$$;
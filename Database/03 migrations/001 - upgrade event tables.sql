@@ -0,0 +1,210 @@
+/*
+    Upgrades a database created with the original schema (date/time columns, no event_id) to the current one.
+    Safe to run more than once.
+
+    Run order on an existing database:
+        1. this script
+        2. 01 schema/create table - tbldaily_ph_earthquake_intensity.sql, create table - tbldaily_ph_earthquake_rollups.sql
+        3. every file of 02 stored procedures
+        4. call public.sp_insert_ph_eq_data()    -- merges raw into the curated table and fills the rollups
+
+    sp_insert_ph_eq_data() upserts every row of raw.tbldaily_earthquake_data on event_id, and takes the local date
+    and time from origin_time, the location parts from the columns split by modules.LocationParser and the bulletin
+    fields from the columns parsed by modules.BulletinParser. Rows loaded before those columns existed get them here
+    first (origin_time from date + time, the location parts from location, the bulletin fields from details, with
+    the same patterns as the Python parsers), otherwise the first call would overwrite the curated values of every
+    historical event with NULL.
+
+    page_hash stays NULL for the historical rows, their raw pages were never archived.
+*/
+
+begin;
+
+create extension if not exists postgis;
+
+-- bulletin dates ('02 Oct 2024 - 05:19:50 AM', '03 October 2024 - 11:00 PM', 'Sept'), NULL when unreadable
+create or replace function pg_temp.fn_bulletin_timestamp(value text)
+returns timestamp
+language plpgsql
+as $$
+begin
+    return replace(value, ' - ', ' ')::timestamp;
+exception when others then
+    return null;
+end;
+$$;
+
+
+-------------------------------------------
+-- raw.tbldaily_earthquake_data
+-------------------------------------------
+do $$
+begin
+    if to_regclass('raw.tbldaily_earthquake_data') is null then
+        return;
+    end if;
+
+    -- the columns main.dump_to_database loads today, with the types DBConnect.DataDumper gives them
+    alter table raw.tbldaily_earthquake_data
+        add column if not exists event_id text,
+        add column if not exists origin_time timestamptz,
+        add column if not exists ref_distance_km real,
+        add column if not exists ref_bearing_deg real,
+        add column if not exists municipality text,
+        add column if not exists province text,
+        add column if not exists info_no bigint,
+        add column if not exists event_datetime timestamp,
+        add column if not exists depth_of_focus_km bigint,
+        add column if not exists origin text,
+        add column if not exists magnitude_type text,
+        add column if not exists expecting_damage text,
+        add column if not exists expecting_aftershocks text,
+        add column if not exists issued_on timestamp,
+        add column if not exists page_hash text;
+
+    -- the '2024_1005_1619' stem of the bulletin link, the same key main.clean_summary_data extracts
+    update raw.tbldaily_earthquake_data
+    set event_id = substring(hlink from '(\d{4}_\d{4}_\d{4})[^/]*$')
+    where event_id is null;
+
+    -- old rows: 'date' (timestamp) + 'time' ('HH:MM:SS' text), both Philippine time
+    if exists (select 1 from information_schema.columns where table_schema = 'raw' and table_name = 'tbldaily_earthquake_data' and column_name = 'date')
+        and exists (select 1 from information_schema.columns where table_schema = 'raw' and table_name = 'tbldaily_earthquake_data' and column_name = 'time')
+    then
+        execute $sql$
+            update raw.tbldaily_earthquake_data
+            set origin_time = (date::date + time::time) at time zone 'Asia/Manila'
+            where origin_time is null
+                and date is not null
+                and time is not null
+        $sql$;
+    end if;
+
+    -- location parts, same pattern and bearings as modules.LocationParser ('023 km N 74° E of Cagwait (Surigao Del Sur)')
+    with parsed as (
+        select
+            ctid as row_id,
+            regexp_match(
+                location,
+                '^\s*(\d+(?:\.\d+)?)\s*km\s+(North|South|East|West|[NSEW])(?:\s*(\d+(?:\.\d+)?)\s*°?\s*(East|West|[EW]))?\s+of\s+(.+?)\s*\(([^()]*)\)\s*$'
+            ) as m
+        from raw.tbldaily_earthquake_data
+        where province is null
+            and location is not null
+    )
+    update raw.tbldaily_earthquake_data r
+    set ref_distance_km = m[1]::real,
+        ref_bearing_deg = case
+            when m[3] is null then case left(m[2], 1) when 'N' then 0 when 'E' then 90 when 'S' then 180 else 270 end
+            when left(m[2], 1) = 'N' and left(m[4], 1) = 'E' then m[3]::real
+            when left(m[2], 1) = 'N' then mod(360 - m[3]::numeric, 360)::real
+            when left(m[4], 1) = 'E' then 180 - m[3]::real
+            else 180 + m[3]::real
+        end,
+        municipality = btrim(m[5]),
+        province = btrim(m[6])
+    from parsed
+    where r.ctid = parsed.row_id
+        and parsed.m is not null;
+
+    -- bulletin fields, same patterns as modules.BulletinParser
+    if exists (select 1 from information_schema.columns where table_schema = 'raw' and table_name = 'tbldaily_earthquake_data' and column_name = 'details') then
+        execute $sql$
+            update raw.tbldaily_earthquake_data
+            set info_no = substring(details from 'EARTHQUAKE INFORMATION NO\. : (\d+)')::bigint,
+                event_datetime = pg_temp.fn_bulletin_timestamp(substring(details from 'Date/Time : (\d{1,2} \w+ \d{4} - \d{1,2}:\d{2}:\d{2} [AP]M)')),
+                depth_of_focus_km = substring(details from 'Depth of Focus \(Km\) : (\d+)')::bigint,
+                origin = btrim(substring(details from 'Origin : (.+?) Magnitude :')),
+                magnitude_type = substring(details from 'Magnitude : ([A-Za-z]+) ?\d'),
+                expecting_damage = btrim(substring(details from 'Expecting Damage : (.+?) Expecting Aftershocks :')),
+                expecting_aftershocks = btrim(substring(details from 'Expecting Aftershocks : (.+?) Issued On :')),
+                issued_on = pg_temp.fn_bulletin_timestamp(substring(details from 'Issued On : (\d{1,2} \w+ \d{4} - \d{1,2}:\d{2} [AP]M)'))
+            where info_no is null
+                and details is not null
+        $sql$;
+    end if;
+
+    -- a key can only be loaded once (main.dump_to_database upserts on event_id), keep the last loaded row
+    delete from raw.tbldaily_earthquake_data r
+    using raw.tbldaily_earthquake_data newer
+    where newer.event_id = r.event_id
+        and newer.ctid > r.ctid;
+
+    create unique index if not exists ux_tbldaily_earthquake_data_key on raw.tbldaily_earthquake_data (event_id);
+end;
+$$;
+
+
+-------------------------------------------
+-- public.tbldaily_ph_earthquake_data
+-------------------------------------------
+alter table public.tbldaily_ph_earthquake_data
+    add column if not exists event_id varchar,
+    add column if not exists origin_time timestamptz,
+    add column if not exists ref_distance_km real,
+    add column if not exists ref_bearing_deg real,
+    add column if not exists municipality varchar,
+    add column if not exists province varchar,
+    add column if not exists event_datetime timestamp,
+    add column if not exists magnitude_type varchar,
+    add column if not exists issued_on timestamp,
+    add column if not exists page_hash char(64);
+
+update public.tbldaily_ph_earthquake_data
+set event_id = substring(page_link from '(\d{4}_\d{4}_\d{4})[^/]*$')
+where event_id is null;
+
+update public.tbldaily_ph_earthquake_data
+set origin_time = (date + time) at time zone 'Asia/Manila'
+where origin_time is null
+    and date is not null
+    and time is not null;
+
+-- geo_point was a '[lon,lat]' string
+do $$
+begin
+    if (select udt_name from information_schema.columns
+        where table_schema = 'public' and table_name = 'tbldaily_ph_earthquake_data' and column_name = 'geo_point') <> 'geometry'
+    then
+        alter table public.tbldaily_ph_earthquake_data
+            alter column geo_point type geometry(Point, 4326)
+            using ST_SetSRID(ST_MakePoint(geo_long, geo_lat), 4326);
+    end if;
+end;
+$$;
+
+-- event_id becomes the key of the upsert of sp_insert_ph_eq_data(), drop the rows without one and the duplicates
+delete from public.tbldaily_ph_earthquake_data
+where event_id is null;
+
+delete from public.tbldaily_ph_earthquake_data c
+using public.tbldaily_ph_earthquake_data newer
+where newer.event_id = c.event_id
+    and newer.ctid > c.ctid;
+
+do $$
+begin
+    if not exists (select 1 from pg_constraint where conrelid = 'public.tbldaily_ph_earthquake_data'::regclass and contype = 'p') then
+        alter table public.tbldaily_ph_earthquake_data add primary key (event_id);
+    end if;
+end;
+$$;
+
+create index if not exists ix_tbldaily_ph_earthquake_data_geo_point
+    on public.tbldaily_ph_earthquake_data using gist (geo_point);
+create index if not exists ix_tbldaily_ph_earthquake_data_geo_point_geog
+    on public.tbldaily_ph_earthquake_data using gist ((geo_point::geography));
+create index if not exists ix_tbldaily_ph_earthquake_data_province
+    on public.tbldaily_ph_earthquake_data (province, municipality);
+create index if not exists ix_tbldaily_ph_earthquake_data_origin_time
+    on public.tbldaily_ph_earthquake_data (origin_time, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_province_time
+    on public.tbldaily_ph_earthquake_data (province, origin_time, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_magnitude
+    on public.tbldaily_ph_earthquake_data (magnitude, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_depth
+    on public.tbldaily_ph_earthquake_data (depth_km, event_id);
+create index if not exists ix_tbldaily_ph_earthquake_data_date
+    on public.tbldaily_ph_earthquake_data (date);
+
+commit;
@@ -0,0 +1,218 @@
+"""
+Backfill of the PHIVOLCS monthly earthquake archives.
+
+Scrapes the EQLatest-Monthly/<year>/<year>_<Month>.html archive pages of a range of months together with all
+their linked bulletins, and loads them the same way main.py loads the landing page. Summary pages and bulletins
+are fetched concurrently, and the pages are parsed in a process pool.
+
+A checkpoint file records every month that was fully loaded, so an interrupted run picks up where it stopped
+when started again with the same checkpoint.
+
+The raw bulletins are kept in the bulletin archive (main.ARCHIVE_DIR). With --reparse nothing is fetched: the
+events of the months are read back from the Parquet catalogue, their archived bulletins are parsed again and the
+results are reloaded, e.g. after a change of modules.BulletinParser.
+
+Usage (from the PhilippineEarthquakeWebScrapper folder):
+    python backfill.py --start 2023-01 --end 2024-09 [--workers 8] [--processes 4] [--no-db] [--reparse]
+"""
+
+
+import os
+import json
+import argparse
+import calendar
+import warnings
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.Logger import Logger
+from modules.DBConnect import DBConnect
+from modules.PageFetcher import PageFetcher
+from modules.PageCache import PageCache
+from modules.EventCatalog import EventCatalog
+from modules.BulletinParser import BulletinParser
+from modules.BulletinArchive import BulletinArchive
+from main import parse_summary_table, clean_summary_data, scrape_detail_data, parse_detail_data, reparse_archive, dump_to_database, CATALOG_DIR, ARCHIVE_DIR
+
+
+ARCHIVE_URL = 'https://earthquake.phivolcs.dost.gov.ph/EQLatest-Monthly/{year}/{year}_{month_name}.html'
+
+
+def month_range(start, end):
+    """
+    Lists the (year, month) pairs from start to end inclusive. start and end are 'YYYY-MM' strings.
+    """
+    start_year, start_month = (int(part) for part in start.split('-'))
+    end_year, end_month = (int(part) for part in end.split('-'))
+
+    months = []
+    year, month = start_year, start_month
+    while (year, month) <= (end_year, end_month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def archive_url(year, month):
+    return ARCHIVE_URL.format(year=year, month_name=calendar.month_name[month])
+
+
+def load_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path, encoding='utf-8') as checkpoint_file:
+            return set(json.load(checkpoint_file)['completed'])
+    except (OSError, ValueError, KeyError):
+        return set()
+
+
+def save_checkpoint(checkpoint_path, completed):
+    tmp_path = f'{checkpoint_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as checkpoint_file:
+        json.dump({'completed': sorted(completed)}, checkpoint_file, indent=2)
+    os.replace(tmp_path, checkpoint_path)  # never leave a half written checkpoint behind
+
+
+def backfill(months, logger, checkpoint_path='backfill_checkpoint.json', max_workers=8, processes=None, cache=None, load_to_db=True, archive=None):
+    """
+    Scrapes and loads every month of months that is not yet in the checkpoint.
+
+    Parameters:
+        months: List of (year, month) pairs, see month_range().
+        logger: The logger instance to log messages.
+        checkpoint_path: Json file listing the months already loaded.
+        max_workers: Maximum number of pages fetched at the same time.
+        processes: Number of parsing processes (default: number of CPUs).
+        cache: Optional PageCache for the bulletin pages.
+        archive: Optional BulletinArchive, keeps the raw bulletins for reparse().
+        load_to_db: Load each month to the database (main.dump_to_database). The months are always written to the
+                    Parquet catalogue (main.CATALOG_DIR).
+
+    Returns:
+        list: The 'YYYY-MM' keys of the months that failed and should be retried.
+    """
+    completed = load_checkpoint(checkpoint_path)
+    pending = [(year, month) for year, month in months if f'{year}-{month:02d}' not in completed]
+    logger.log_message(f"{len(months) - len(pending)} of {len(months)} months already done, {len(pending)} to go", level='info')
+    if not pending:
+        return []
+
+    failed = []
+    fetcher = PageFetcher(max_workers=max_workers)
+    catalog = EventCatalog(CATALOG_DIR)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # the summary pages are small, fetch all of them at once then go month by month for the bulletins
+        urls = [archive_url(year, month) for year, month in pending]
+        summary_results = fetcher.fetch_all(urls)
+        summary_futures = [executor.submit(parse_summary_table, result.content, result.url) if result.ok else None for result in summary_results]
+
+        for (year, month), result, future in zip(pending, summary_results, summary_futures):
+            month_key = f'{year}-{month:02d}'
+            try:
+                with logger.span('backfill_month'):
+                    if not result.ok:
+                        raise RuntimeError(f"failed to fetch {result.url}. {result.error}")
+
+                    cleaned = clean_summary_data(future.result(), logger)
+                    if cleaned is None:
+                        raise RuntimeError(f"failed to clean the summary table of {result.url}")
+                    _, _, df_month = cleaned
+
+                    df_month = scrape_detail_data(df_month, logger, max_workers=max_workers, cache=cache, executor=executor, archive=archive)
+                    df_month = parse_detail_data(df_month, logger)
+
+                    if load_to_db and not dump_to_database(df_month, logger):
+                        raise RuntimeError('failed to load to the database')
+
+                    catalog.write(df_month)
+
+                    completed.add(month_key)
+                    save_checkpoint(checkpoint_path, completed)
+                    logger.log_message(f"Backfilled {month_key}: {len(df_month)} events", level='info')
+
+            except Exception as e:
+                failed.append(month_key)
+                logger.log_message(f"Failed to backfill {month_key}: {e}", level='error')
+
+    return failed
+
+
+def reparse(months, logger, archive, processes=None, load_to_db=True):
+    """
+    Parses the archived bulletins of the catalogued events of months again and reloads them, without fetching
+    anything (see main.reparse_archive()).
+
+    Parameters:
+        months: List of (year, month) pairs, see month_range().
+        logger: The logger instance to log messages.
+        archive: The BulletinArchive holding the raw bulletins.
+        processes: Number of parsing processes (default: number of CPUs).
+        load_to_db: Reload the events to the database (main.dump_to_database), as well as to the catalogue.
+
+    Returns:
+        int: The number of events reparsed.
+    """
+    catalog = EventCatalog(CATALOG_DIR)
+    (start_year, start_month), (end_year, end_month) = months[0], months[-1]
+    end = pd.Timestamp(year=end_year, month=end_month, day=1) + pd.DateOffset(months=1)
+    df_events = catalog.read(start=f'{start_year}-{start_month:02d}-01', end=end)
+    if df_events.empty:
+        return 0
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        with logger.span('reparse'):
+            df_parsed = reparse_archive(archive, logger, event_ids=df_events['event_id'], executor=executor)
+
+    # the summary columns come from the catalogue, the bulletin columns from the archived pages
+    stale_columns = [column for column in BulletinParser.COLUMNS + ['hlink', 'page_hash'] if column in df_events.columns]
+    df_events = df_events.drop(columns=stale_columns).merge(df_parsed, on='event_id', how='inner')
+
+    if load_to_db and not dump_to_database(df_events, logger):
+        raise RuntimeError('failed to load to the database')
+    catalog.write(df_events)
+
+    logger.log_message("Reparsed %d events from the bulletin archive", 'info', len(df_events))
+    return len(df_events)
+
+
+if __name__ == '__main__':
+
+    # Suppress all warnings
+    warnings.filterwarnings("ignore")
+
+    parser = argparse.ArgumentParser(description='Backfill the PHIVOLCS monthly earthquake archives')
+    parser.add_argument('--start', required=True, help='first month, YYYY-MM')
+    parser.add_argument('--end', required=True, help='last month, YYYY-MM')
+    parser.add_argument('--workers', type=int, default=8, help='pages fetched at the same time')
+    parser.add_argument('--processes', type=int, default=None, help='parsing processes (default: number of CPUs)')
+    parser.add_argument('--checkpoint', default='backfill_checkpoint.json')
+    parser.add_argument('--no-db', action='store_true', help='only write the Parquet catalogue')
+    parser.add_argument('--reparse', action='store_true', help='parse the archived bulletins again instead of scraping')
+    args = parser.parse_args()
+
+    logger = Logger()  # Initialize the logger instance
+    bulletin_archive = BulletinArchive(ARCHIVE_DIR)
+
+    if args.reparse:
+        reparse(month_range(args.start, args.end), logger, bulletin_archive, processes=args.processes, load_to_db=not args.no_db)
+        logger.summarize()
+        DBConnect.dispose_engines()
+        raise SystemExit(0)
+
+    failed_months = backfill(
+        month_range(args.start, args.end),
+        logger,
+        checkpoint_path=args.checkpoint,
+        max_workers=args.workers,
+        processes=args.processes,
+        cache=PageCache('page_cache', fresh_for=30 * 24 * 3600),  # archived bulletins do not change
+        load_to_db=not args.no_db,
+        archive=bulletin_archive
+    )
+
+    if failed_months:
+        logger.log_message(f"Months to retry: {', '.join(failed_months)}", level='warning')
+
+    logger.summarize()
+
+    DBConnect.dispose_engines()
@@ -0,0 +1,66 @@
+"""
+Benchmark of the html extraction backends of modules.HtmlExtractor.
+
+Parses the recorded summary page (fixtures/landing_page.html) and bulletin page (fixtures/bulletin.html) with every
+available backend and prints the pages/s of the summary extraction and of both bulletin modes, and whether each
+backend gives the same rows / compat text as the bs4 backend.
+
+Usage (from the PhilippineEarthquakeWebScrapper folder):
+    python benchmarks/bench_html_extraction.py [--pages 200] [--repeat 3]
+"""
+
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.HtmlExtractor import HtmlExtractor, BACKENDS, lxml  # noqa: E402
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASE_URL = 'https://earthquake.phivolcs.dost.gov.ph/'
+
+
+def pages_per_second(func, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(pages) / best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Html extraction backend benchmark')
+    parser.add_argument('--pages', type=int, default=200, help='bulletin pages parsed per run')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, 'landing_page.html'), 'rb') as page_file:
+        summary_page = page_file.read()
+    with open(os.path.join(FIXTURES, 'bulletin.html'), 'rb') as page_file:
+        template = page_file.read()
+    bulletins = [template.replace(b'{event_id}', f'2024_1001_{i:04d}'.encode()) for i in range(args.pages)]
+
+    backends = [backend for backend in BACKENDS if backend != 'lxml' or lxml is not None]
+    reference = HtmlExtractor('bs4')
+    reference_rows = reference.summary_rows(summary_page, BASE_URL)
+    reference_text = reference.bulletin_text(bulletins[0])
+
+    print(f'{"backend":8} {"summary":>12} {"bulletin":>12} {"targeted":>12}   same output as bs4')
+    for backend in backends:
+        compat = HtmlExtractor(backend, 'compat')
+        targeted = HtmlExtractor(backend, 'targeted')
+
+        summary_rate = pages_per_second(lambda page: compat.summary_rows(page, BASE_URL), [summary_page], args.repeat)
+        compat_rate = pages_per_second(compat.bulletin_text, bulletins, args.repeat)
+        targeted_rate = pages_per_second(targeted.bulletin_text, bulletins, args.repeat)
+
+        same = (compat.summary_rows(summary_page, BASE_URL) == reference_rows
+                and compat.bulletin_text(bulletins[0]) == reference_text)
+        print(f'{backend:8} {summary_rate:8.1f} p/s {compat_rate:8.1f} p/s {targeted_rate:8.1f} p/s   {same}')
@@ -0,0 +1,84 @@
+"""
+Benchmark of the summary table extraction: the old per-cell WebDriver loop against the single-pass
+page_source + parse_summary_table extraction.
+
+Opens a recorded summary page (default: fixtures/landing_page.html, 500 rows) in Edge through a file:// url,
+runs both extractions and prints their timings. If Edge/selenium is not available only the local parsing time
+is reported.
+
+Usage (from the PhilippineEarthquakeWebScrapper folder):
+    python benchmarks/bench_summary_extraction.py [--page path/to/page.html] [--repeat 3]
+"""
+
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from stub_logger import StubLogger  # noqa: E402
+
+
+def scrape_summary_data_per_cell(browser):
+    '''
+    The previous implementation of main.scrape_summary_data, one WebDriver call per row, cell and hyperlink.
+    '''
+    By = main.By
+    tbody = browser.find_element(By.XPATH, '/html/body/div/table[3]/tbody')
+    data = []
+
+    for tr in tbody.find_elements(By.XPATH, '//tr'):
+        row = []
+        for td in tr.find_elements(By.XPATH, './/td'):
+            a_element = td.find_element(By.TAG_NAME, 'a') if td.find_elements(By.TAG_NAME, 'a') else None
+            if a_element:
+                row.append(a_element.text)
+                row.append(a_element.get_attribute('href'))
+            else:
+                row.append(td.text)
+        data.append(row)
+
+    return data
+
+
+def time_call(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Summary table extraction benchmark')
+    parser.add_argument('--page', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'landing_page.html'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    page_url = Path(args.page).resolve().as_uri()
+    with open(args.page, 'rb') as page_file:
+        page_source = page_file.read()
+
+    parse_time, rows = time_call(lambda: main.parse_summary_table(page_source, page_url), args.repeat)
+    print(f'local parse only      : {parse_time * 1000:9.1f} ms  ({len(rows)} rows)')
+
+    browser = main.initialize_scrapper(page_url, StubLogger())
+    if browser is None:
+        print('Edge/selenium not available, skipping the WebDriver comparison')
+        sys.exit(0)
+
+    try:
+        per_cell_time, per_cell_rows = time_call(lambda: scrape_summary_data_per_cell(browser), args.repeat)
+        single_pass_time, single_pass_rows = time_call(lambda: main.scrape_summary_data(browser, StubLogger()), args.repeat)
+    finally:
+        browser.quit()
+
+    print(f'per-cell WebDriver    : {per_cell_time * 1000:9.1f} ms  ({len(per_cell_rows)} rows)')
+    print(f'single-pass           : {single_pass_time * 1000:9.1f} ms  ({len(single_pass_rows)} rows)')
+    print(f'speed-up              : {per_cell_time / single_pass_time:9.1f}x')
@@ -0,0 +1,148 @@
+"""
+Local stand-in for the PHIVOLCS earthquake site, serving the recorded pages of benchmarks/fixtures.
+
+Routes:
+    /                                                  -> fixtures/landing_page.html
+    /EQLatest-Monthly/<year>/<year>_<Month>.html       -> fixtures/landing_page.html with the month header replaced
+    /<year>_Earthquake_Information/<Month>/<name>.html -> fixtures/bulletin.html, '{event_id}' filled in from <name>
+
+Every response carries an ETag and honours If-None-Match with a 304, like a static web server would. A fixed
+latency (plus jitter) can be added to every response and a share of the requests can be answered with a 503 to
+test the error handling of the scraper.
+
+In-process usage:
+    with FixtureServer(latency=0.05, error_rate=0.01) as server:
+        scraped_data = main.fetch_summary_data(server.url, logger)
+
+Standalone usage (from the PhilippineEarthquakeWebScrapper folder):
+    python benchmarks/fixture_server.py [--port 8765] [--latency 0.05] [--error-rate 0.01]
+"""
+
+
+import os
+import re
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+MONTHLY_PATH = re.compile(r'^/EQLatest-Monthly/(\d{4})/\d{4}_([A-Za-z]+)\.html$')
+BULLETIN_PATH = re.compile(r'^/\d{4}_Earthquake_Information/[A-Za-z]+/(\d{4}_\d{4}_\d{4})[^/]*\.html$')
+
+
+def _read_fixture(file_name):
+    with open(os.path.join(FIXTURES_DIR, file_name), encoding='utf-8') as fixture_file:
+        return fixture_file.read()
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency + server.random.uniform(0, server.jitter))
+
+        with server.lock:
+            server.request_count += 1
+            inject_error = server.random.random() < server.error_rate
+        if inject_error:
+            self._send(503, b'Service Unavailable')
+            return
+
+        path = self.path.split('?')[0].replace('\\', '/')
+        monthly_match = MONTHLY_PATH.match(path)
+        bulletin_match = BULLETIN_PATH.match(path)
+
+        if path in ('/', '/index.html'):
+            body = server.landing_page
+        elif monthly_match:
+            year, month_name = monthly_match.groups()
+            body = server.landing_page.replace('October 2024', f'{month_name} {year}')
+        elif bulletin_match:
+            body = server.bulletin.replace('{event_id}', bulletin_match.group(1))
+        else:
+            self._send(404, b'Not Found')
+            return
+
+        body = body.encode('utf-8')
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', etag)
+        else:
+            self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+
+class FixtureServer:
+    '''
+    Serves the recorded fixtures on localhost from a background thread.
+    '''
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.landing_page = _read_fixture('landing_page.html')
+        self._httpd.bulletin = _read_fixture('bulletin.html')
+        self._httpd.latency = latency
+        self._httpd.jitter = jitter
+        self._httpd.error_rate = error_rate
+        self._httpd.random = random.Random(seed)
+        self._httpd.lock = threading.Lock()
+        self._httpd.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def request_count(self):
+        return self._httpd.request_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the recorded PHIVOLCS fixtures')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with a 503')
+    args = parser.parse_args()
+
+    server = FixtureServer(args.port, args.latency, args.jitter, args.error_rate)
+    print(f'Serving fixtures on {server.url}')
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,119 @@
+"""
+End-to-end benchmark of the scraping pipeline against the local fixture server (no PHIVOLCS traffic).
+
+Times every stage of main.py and reports its throughput:
+    summary  : fetch_summary_data (or initialize_scrapper + scrape_summary_data with --selenium)   pages/s
+    clean    : clean_summary_data                                                                 events/s
+    details  : scrape_detail_data, archiving the bulletins to a temporary BulletinArchive          pages/s
+    parse    : parse_detail_data                                                                  events/s
+    catalog  : EventCatalog.write to a temporary folder                                          rows/s
+    load     : dump_to_database (only with --db, needs the local_phil_earthquakes database)       rows loaded/s
+
+With --json-out the results are appended as one json line per run, so runs can be compared over time.
+
+Usage (from the PhilippineEarthquakeWebScrapper folder):
+    python benchmarks/run_pipeline_benchmark.py [--latency 0.05] [--error-rate 0.01] [--workers 8] [--db]
+"""
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import warnings
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from fixture_server import FixtureServer  # noqa: E402
+from stub_logger import StubLogger  # noqa: E402
+from modules.EventCatalog import EventCatalog  # noqa: E402
+from modules.BulletinArchive import BulletinArchive  # noqa: E402
+
+
+def run_stage(results, name, func, unit, count_func):
+    start_time = time.perf_counter()
+    output = func()
+    elapsed = time.perf_counter() - start_time
+    count = count_func(output)
+    results[name] = {
+        'seconds': round(elapsed, 4),
+        'count': count,
+        'unit': unit,
+        'throughput': round(count / elapsed, 2) if elapsed > 0 else None
+    }
+    return output
+
+
+def run_benchmark(latency=0.0, jitter=0.0, error_rate=0.0, workers=8, use_selenium=False, load_to_db=False):
+    logger = StubLogger(levels=('warning', 'error', 'exception'))
+    results = {}
+
+    with FixtureServer(latency=latency, jitter=jitter, error_rate=error_rate) as server:
+        if use_selenium:
+            def summary():
+                browser = main.initialize_scrapper(server.url, logger)
+                try:
+                    return main.scrape_summary_data(browser, logger)
+                finally:
+                    if browser:
+                        browser.quit()
+        else:
+            def summary():
+                return main.fetch_summary_data(server.url, logger)
+
+        scraped_data = run_stage(results, 'summary', summary, 'pages/s', lambda data: 1 if data else 0)
+        data_month, data_year, df_data = run_stage(results, 'clean', lambda: main.clean_summary_data(scraped_data, logger), 'events/s', lambda output: len(output[2]))
+        with tempfile.TemporaryDirectory() as archive_dir:
+            archive = BulletinArchive(archive_dir)
+            df_data = run_stage(results, 'details', lambda: main.scrape_detail_data(df_data, logger, max_workers=workers, archive=archive), 'pages/s', lambda df: int(df['details'].notna().sum()))
+        df_data = run_stage(results, 'parse', lambda: main.parse_detail_data(df_data, logger), 'events/s', lambda df: int(df['info_no'].notna().sum()))
+
+        with tempfile.TemporaryDirectory() as catalog_dir:
+            run_stage(results, 'catalog', lambda: EventCatalog(catalog_dir).write(df_data), 'rows/s', lambda row_count: row_count)
+
+        if load_to_db:
+            run_stage(results, 'load', lambda: main.dump_to_database(df_data, logger), 'rows loaded/s', lambda loaded: len(df_data) if loaded else 0)
+
+        request_count = server.request_count
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'settings': {'latency': latency, 'jitter': jitter, 'error_rate': error_rate, 'workers': workers, 'selenium': use_selenium, 'db': load_to_db},
+        'requests': request_count,
+        'stages': results,
+        'total_seconds': round(sum(stage['seconds'] for stage in results.values()), 4)
+    }
+
+
+def print_report(report):
+    print(f"{'stage':<10}{'seconds':>10}{'count':>8}  throughput")
+    for name, stage in report['stages'].items():
+        print(f"{name:<10}{stage['seconds']:>10.3f}{stage['count']:>8}  {stage['throughput']} {stage['unit']}")
+    print(f"{'total':<10}{report['total_seconds']:>10.3f}  ({report['requests']} requests served)")
+
+
+if __name__ == '__main__':
+
+    # Suppress all warnings
+    warnings.filterwarnings("ignore")
+
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark against the fixture server')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.02, help='random extra latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with a 503')
+    parser.add_argument('--workers', type=int, default=8, help='bulletin pages fetched at the same time')
+    parser.add_argument('--selenium', action='store_true', help='scrape the summary page with Edge instead of plain http')
+    parser.add_argument('--db', action='store_true', help='include the database load stage')
+    parser.add_argument('--json-out', help='append the results as a json line to this file')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.latency, args.jitter, args.error_rate, args.workers, args.selenium, args.db)
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, 'a', encoding='utf-8') as out_file:
+            out_file.write(json.dumps(report) + '\n')
@@ -0,0 +1,42 @@
+"""
+Stand-in for modules.Logger used by the benchmarks: prints the messages of the given levels to stdout, writes no
+log files and records no metrics.
+
+Usage (from a script of the benchmarks folder):
+    from stub_logger import StubLogger
+    logger = StubLogger()                                           # every level
+    logger = StubLogger(levels=('warning', 'error', 'exception'))   # only warnings and errors
+"""
+
+
+import contextlib
+
+
+ALL_LEVELS = ('debug', 'info', 'warning', 'error', 'exception')
+
+
+class StubLogger:
+    '''
+    The subset of the modules.Logger interface that the pipeline stages of main.py use.
+    '''
+    def __init__(self, levels=ALL_LEVELS):
+        self.levels = tuple(levels)
+
+    def log_message(self, message, level='info', *args):
+        if level in self.levels:
+            print(f'[{level}] {message % args if args else message}')
+
+    def span(self, name):
+        return contextlib.nullcontext()
+
+    def increment(self, name, value=1, label=None):
+        pass
+
+    def record_timing(self, name, seconds, failed=False):
+        pass
+
+    def is_enabled(self, level):
+        return level in self.levels
+
+    def context(self, **fields):
+        return contextlib.nullcontext()
@@ -1,27 +1,55 @@
 import os
-import selenium.webdriver as webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
-from selenium.webdriver.common.by import By
 import time
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 import warnings
-import re
 import json
+
+try:
+    # selenium is only needed for the browser fallback of the summary scraper
+    import selenium.webdriver as webdriver
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.edge.options import Options
+    from selenium.webdriver.common.by import By
+except ImportError:
+    webdriver = None
 # import logging
 # from datetime import datetime
 
 # custom modules import
 from modules.Logger import Logger
+from psycopg2 import sql
 from modules.DBConnect import DBConnect # 0.1
-
-
-def initialize_scrapper(url, logger):
+from modules.PageFetcher import PageFetcher
+from modules.HttpClient import HttpClient, USER_AGENT
+from modules.PageCache import PageCache
+from modules.BulletinParser import BulletinParser
+from modules.LocationParser import LocationParser
+from modules.EventCatalog import EventCatalog
+from modules.IntensityParser import IntensityParser
+from modules.HtmlExtractor import HtmlExtractor
+from modules.BulletinArchive import BulletinArchive, page_hash
+
+
+PH_TIMEZONE = 'Asia/Manila'
+CATALOG_DIR = 'scraped_data/catalog'
+ARCHIVE_DIR = 'bulletin_archive'
+INTENSITY_TABLE = 'tbldaily_ph_earthquake_intensity'
+# merges raw into the curated table and refreshes the dashboard rollups of the days that changed
+CURATE_SP = 'call public.sp_insert_ph_eq_data();'
+ORIGIN_TIME_FORMAT = '%d %B %Y - %I:%M %p'
+
+# lxml when installed, else BeautifulSoup; 'compat' bulletin text keeps the stored 'details' values unchanged
+HTML_EXTRACTOR = HtmlExtractor(bulletin_mode='compat')
+
+
+def initialize_scrapper(url, logger, edge_driver_path=None):
     try:
-        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36 Edg/129.0.0.0'
-        edge_driver_path = os.path.join(os.getcwd(), 'edgedriver_win64', 'msedgedriver.exe')
+        if webdriver is None:
+            raise ImportError('selenium is not installed')
+
+        user_agent = USER_AGENT
+        if edge_driver_path is None:
+            edge_driver_path = os.path.join(os.getcwd(), 'edgedriver_win64', 'msedgedriver.exe')
         edge_service = Service(edge_driver_path)
         edge_options = Options()
         edge_options.add_argument(f'user-agent={user_agent}')
@@ -39,10 +67,59 @@ def initialize_scrapper(url, logger):
         return None
 
 
+def parse_summary_table(page_source, base_url):
+    """
+    Parses the summary page html into the same list of lists that scrape_summary_data returns.
+
+    Every row of the document is kept (the same rows the '//tr' XPath of scrape_summary_data returns), since
+    clean_summary_data relies on the month/year header row and the year row that follow the data.
+
+    Parameters:
+        page_source: The html of the summary page.
+        base_url: The url of the page, used to resolve relative hyperlinks.
+
+    Returns:
+        list: A list of lists containing the cell texts, with the href following the text of each linked cell.
+    """
+    return HTML_EXTRACTOR.summary_rows(page_source, base_url)
+
+
+def fetch_summary_data(url, logger, timeout=30):
+    """
+    Scrapes the summary table with a plain HTTP request, without launching a browser.
+
+    Parameters:
+        url: The url of the summary page.
+        logger: The logger instance to log messages.
+        timeout: Request timeout in seconds.
+
+    Returns:
+        list: The same list of lists as scrape_summary_data, or an empty list on failure.
+    """
+    try:
+        response = HttpClient.default().get(url, timeout=timeout)
+        logger.increment('http_status', label=response.status_code)
+        response.raise_for_status()
+        logger.increment('pages_fetched')
+        logger.increment('bytes_downloaded', len(response.content))
+
+        data = parse_summary_table(response.content, response.url)
+
+        logger.log_message("Data scraped successfully (http)", level='info')
+        return data
+
+    except Exception as e:
+        logger.log_message(f"Failed to fetch summary page: {e}", level='exception')
+        return []
+
+
 def scrape_summary_data(browser, logger):
     """
     Scrapes data from the specified table on the webpage.
 
+    The page html is pulled from the browser once (a single WebDriver round-trip) and parsed locally with
+    parse_summary_table, instead of querying the browser for every row, cell and hyperlink.
+
     Parameters:
         browser: The Selenium WebDriver instance.
         logger: The logger instance to log messages.
@@ -51,24 +128,8 @@ def scrape_summary_data(browser, logger):
         list: A list of lists containing the scraped data along with hyperlinks.
     """
     try:
-        tbody = browser.find_element(By.XPATH, '/html/body/div/table[3]/tbody')  # XPath of specific table in webpage
-        data = []
-
-        for tr in tbody.find_elements(By.XPATH, '//tr'):  # Use './tr' to avoid searching all tr elements in the document
-            row = []
-            for td in tr.find_elements(By.XPATH, './/td'):  # Iterate through each cell in the row
-                # Check for hyperlink in the cell
-                a_element = td.find_element(By.TAG_NAME, 'a') if td.find_elements(By.TAG_NAME, 'a') else None
-                if a_element:
-                    # If a hyperlink is found, append its text and href to the row
-                    row.append(a_element.text)
-                    row.append(a_element.get_attribute('href'))
-                    # row.append(a_element.text, a_element.get_attribute('href'))
-                    
-                else:
-                    # Append the text if there's no hyperlink
-                    row.append(td.text)
-            data.append(row)
+        browser.find_element(By.XPATH, '/html/body/div/table[3]/tbody')  # make sure the data table (XPath of specific table in webpage) is loaded
+        data = parse_summary_table(browser.page_source, browser.current_url)
 
         logger.log_message("Data scraped successfully", level='info')
         return data
@@ -94,8 +155,8 @@ def clean_summary_data(scraped_data, logger):
         
         data_month, data_year = data_month_year_parts
 
-        logger.log_message(f"Month: {data_month}", level='debug')
-        logger.log_message(f"Year: {data_year}", level='debug')
+        logger.log_message("Month: %s", 'debug', data_month)
+        logger.log_message("Year: %s", 'debug', data_year)
 
         data_removed_empty = [entry for entry in scraped_data if entry]  # Remove empty lists
 
@@ -124,24 +185,24 @@ def clean_summary_data(scraped_data, logger):
 
         # Convert the sliced list to a DataFrame
         df = pd.DataFrame(final_array, columns=df_headers)
-        
-        # Split the column into date and time
-        df[['date', 'time']] = df['date_time'].str.split(' - ', expand=True)
 
-        # Convert the 'date' column to datetime format
-        df['date'] = pd.to_datetime(df['date'], format='%d %B %Y')
+        # One origin timestamp, parsed in a single pass ('05 October 2024 - 04:19 PM', Philippine time)
+        df['origin_time'] = pd.to_datetime(df['date_time'], format=ORIGIN_TIME_FORMAT).dt.tz_localize(PH_TIMEZONE)
 
-        # Convert the 'time' column to datetime format (24-hour format)
-        df['time'] = pd.to_datetime(df['time'], format='%I:%M %p').dt.strftime('%H:%M:%S')
+        # Convert data types (float32 is plenty for 2 decimal coordinates, km depths and 1 decimal magnitudes)
+        df['latitude'] = pd.to_numeric(df['latitude']).astype('float32')
+        df['longitude'] = pd.to_numeric(df['longitude']).astype('float32')
+        df['depth_km'] = pd.to_numeric(df['depth_km']).astype('float32')
+        df['magnitude'] = pd.to_numeric(df['magnitude']).astype('float32')
 
-        # Convert data types
-        df['latitude'] = df['latitude'].astype(float)
-        df['longitude'] = df['longitude'].astype(float)
-        df['depth_km'] = df['depth_km'].astype(float)
-        df['magnitude'] = df['magnitude'].astype(float)
+        # Distance, bearing, reference town and province of the location ('023 km N 74° E of Cagwait (Surigao Del Sur)')
+        df = df.join(LocationParser().parse(df['location']))
+
+        # Stable event identifier: the '2024_1005_1619' stem of the bulletin link, shared by all bulletin revisions (_B1, _B2, _B4F, ...)
+        df['event_id'] = df['hlink'].str.extract(r'(\d{4}_\d{4}_\d{4})[^/]*$', expand=False)
 
         # Rearranging the columns
-        df = df[['date_time', 'date', 'time', 'latitude', 'longitude', 'depth_km', 'magnitude', 'location', 'hlink']]
+        df = df[['event_id', 'origin_time', 'latitude', 'longitude', 'depth_km', 'magnitude', 'location', 'ref_distance_km', 'ref_bearing_deg', 'municipality', 'province', 'hlink']]
 
         return data_month, data_year, df
 
@@ -149,32 +210,67 @@ def clean_summary_data(scraped_data, logger):
         logger.log_message("Failed to clean data", level='exception')
 
 
-def scrape_detail_data(df_data, logger):
+def extract_bulletin_text(content):
+    """
+    Flattens a bulletin page into a single line of text (the 'details' column).
+    """
+    return HTML_EXTRACTOR.bulletin_text(content)
+
+
+def scrape_detail_data(df_data, logger, max_workers=8, cache=None, executor=None, archive=None):
+    """
+    Fetches the detailed bulletin page of every row and stores its flattened text in a 'details' column, and the
+    sha256 of the raw page in a 'page_hash' column.
+
+    Parameters:
+        df_data: The cleaned summary DataFrame (needs the 'hlink' column).
+        logger: The logger instance to log messages.
+        max_workers: Maximum number of bulletin pages fetched at the same time.
+        cache: Optional PageCache. Pages still fresh in the cache are not downloaded again.
+        executor: Optional concurrent.futures executor (e.g. a ProcessPoolExecutor) used to parse the pages.
+        archive: Optional BulletinArchive. The raw pages are archived under their hash, for reparse_archive().
+
+    Returns:
+        DataFrame: df_data with the 'details' and 'page_hash' columns added. Rows whose page failed to load get None.
+    """
     try:
         print(df_data)
-        
-        def get_details(link):
-            print(link)
-            # Send a request to fetch the content of the webpage, disabling SSL verification
-            response = requests.get(link, verify=False)  # 'verify=False' disables SSL certificate check
-
-            # If the request is successful (status code 200)
-            if response.status_code == 200:
-                # Parse the content using BeautifulSoup
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract the text from the page
-                text_content = soup.get_text(separator="\n")  # Use newline as a separator for better readability
-                
-                # Use regular expression to replace multiple whitespace characters (spaces, newlines, tabs) with a single space
-                cleaned_text = re.sub(r'\s+', ' ', text_content).strip()
-
-                return cleaned_text
-            else:
-                print(f"Failed to retrieve the page. Status code: {response.status_code}")
 
-        
-        df_data['details'] = df_data['hlink'].apply(get_details)
+        fetcher = PageFetcher(max_workers=max_workers, cache=cache)
+        results = fetcher.fetch_all(df_data['hlink'])  # results come back in the same order as the rows
+
+        for event_id, result in zip(df_data['event_id'], results):
+            logger.increment('http_status', label='cache' if result.from_cache else result.status_code)
+            if not result.ok:
+                with logger.context(event_id=event_id, url=result.url):
+                    logger.log_message("Failed to retrieve the bulletin page. %s", 'warning', result.error)
+            elif not result.from_cache:
+                logger.increment('pages_fetched')
+                logger.increment('bytes_downloaded', len(result.content))
+
+        contents = [result.content for result in results if result.ok]
+        if executor:
+            texts = iter(executor.map(extract_bulletin_text, contents, chunksize=16))
+        else:
+            texts = map(extract_bulletin_text, contents)
+
+        df_data['details'] = [next(texts) if result.ok else None for result in results]
+
+        if archive is not None:
+            df_data['page_hash'] = [
+                archive.add(event_id, hlink, result.content) if result.ok else None
+                for event_id, hlink, result in zip(df_data['event_id'], df_data['hlink'], results)
+            ]
+            archive.save()
+        else:
+            df_data['page_hash'] = [page_hash(result.content) if result.ok else None for result in results]
+
+        if logger.is_enabled('debug'):
+            logger.log_message("HTTP client %s, concurrency limit %.1f", 'debug', fetcher.client.stats, fetcher.client.limiter.limit)
+
+        failed_count = sum(1 for result in results if not result.ok)
+        cached_count = sum(1 for result in results if result.from_cache)
+        logger.log_message("Fetched %d of %d detail pages (%d from cache)", 'info', len(results) - failed_count, len(results), cached_count)
         
         return df_data
     
@@ -183,8 +279,112 @@ def scrape_detail_data(df_data, logger):
         return []
 
 
+def parse_detail_data(df_data, logger):
+    """
+    Extracts the bulletin fields (info no., precise date/time, depth of focus, origin, magnitude type, expected
+    damage/aftershocks and issue date) from the 'details' column into typed columns.
+
+    Parameters:
+        df_data: The DataFrame returned by scrape_detail_data.
+        logger: The logger instance to log messages.
 
-def dump_to_database(df_data, logger):
+    Returns:
+        DataFrame: df_data with the BulletinParser.COLUMNS added.
+    """
+    try:
+        df_fields = BulletinParser().parse(df_data['details'])
+        df_data = df_data.join(df_fields)
+
+        parsed_count = int(df_fields['info_no'].notna().sum())
+        logger.increment('rows_parsed', parsed_count)
+        logger.log_message(f"Parsed {parsed_count} of {len(df_fields)} bulletins", level='info')
+        return df_data
+
+    except Exception as e:
+        logger.log_message(f"Failed to parse bulletin details: {e}", level='exception')
+        return df_data
+
+
+def reparse_archive(archive, logger, event_ids=None, executor=None):
+    """
+    Flattens and parses the bulletin pages kept in a BulletinArchive again, without fetching anything. Use it after a
+    change of extract_bulletin_text or modules.BulletinParser.
+
+    Parameters:
+        archive: The BulletinArchive filled by scrape_detail_data.
+        logger: The logger instance to log messages.
+        event_ids: Only reparse these events (default: every archived event).
+        executor: Optional concurrent.futures executor (e.g. a ProcessPoolExecutor) used to parse the pages.
+
+    Returns:
+        DataFrame: The 'event_id', 'hlink', 'page_hash' and 'details' columns and the BulletinParser.COLUMNS of
+                   every archived event.
+    """
+    rows = list(archive.iter_pages(event_ids))
+    contents = [row[3] for row in rows]
+    if executor:
+        texts = list(executor.map(extract_bulletin_text, contents, chunksize=16))
+    else:
+        texts = [extract_bulletin_text(content) for content in contents]
+
+    df_data = pd.DataFrame({
+        'event_id': [row[0] for row in rows],
+        'hlink': [row[1] for row in rows],
+        'page_hash': [row[2] for row in rows],
+        'details': texts
+    })
+    logger.log_message("Read %d bulletin pages from the archive", 'info', len(df_data))
+    return parse_detail_data(df_data, logger)
+
+
+def load_intensities(df_data, sql_conn):
+    """
+    Parses the intensity lists of the bulletins (modules.IntensityParser) and bulk loads them to
+    public.tbldaily_ph_earthquake_intensity, replacing the rows already loaded for the same events.
+
+    Parameters:
+        df_data: DataFrame with the 'event_id' and 'details' columns. Rows without details are skipped.
+        sql_conn: A connected DBConnect.Connector.
+
+    Returns:
+        int: The number of intensity rows loaded, or None if the load failed.
+    """
+    df_bulletins = df_data[df_data['details'].notna()]
+    if df_bulletins.empty:
+        return 0
+
+    def delete_loaded_rows(cursor, target):
+        # a revised bulletin can drop towns, so the rows of an event are replaced rather than merged; the delete runs
+        # in the COPY transaction, a failed load keeps the old rows
+        cursor.execute(
+            sql.SQL('DELETE FROM {} WHERE event_id = ANY(%s);').format(target),
+            (df_bulletins['event_id'].tolist(),)
+        )
+
+    dumper = DBConnect.DataDumper(sql_conn.conn, sql_conn.engine)
+    chunks = IntensityParser().parse(df_bulletins['event_id'], df_bulletins['details'])
+    return dumper.copy_import(chunks, INTENSITY_TABLE, 'public', before_copy=delete_loaded_rows, if_exists='append')
+
+
+def dump_to_database(df_data, logger, mode='upsert', curate=True):
+    """
+    Loads the scraped events to raw.tbldaily_earthquake_data, and their intensities to
+    public.tbldaily_ph_earthquake_intensity (see load_intensities()).
+
+    The flattened bulletin text ('details') is not loaded, only the fields parsed from it and the 'page_hash' of the
+    raw page archived by scrape_detail_data (see reparse_archive()).
+
+    Parameters:
+        df_data: The DataFrame to load.
+        logger: The logger instance to log messages.
+        mode: 'upsert' (default) only inserts new events and updates revised ones, matched on event_id.
+              'replace' drops and reloads the whole table.
+        curate: Run public.sp_insert_ph_eq_data() after the load (CURATE_SP). It merges the new and revised events
+                into public.tbldaily_ph_earthquake_data, and refreshes the dashboard rollups of the days they touch.
+
+    Returns:
+        bool: True if the data was loaded.
+    """
     try:
         db_env = 'local_phil_earthquakes'   
 
@@ -192,14 +392,47 @@ def dump_to_database(df_data, logger):
         SqlConn = DBConnect.Connector(db_env)
         SqlConn.connect()
 
-
-        df_data.to_sql('tbldaily_earthquake_data', SqlConn.engine, if_exists='replace', index = False, schema = 'raw', chunksize = 10000, method='multi')
+        df_events = df_data.drop(columns=['details'], errors='ignore')
+
+        if mode == 'upsert':
+            dumper = DBConnect.DataDumper(SqlConn.conn, SqlConn.engine)
+            with logger.span('db_load'):
+                counts = dumper.data_upsert(df_events, 'tbldaily_earthquake_data', 'raw', key_columns=['event_id'])
+            if counts is None:
+                raise RuntimeError('upsert to raw.tbldaily_earthquake_data failed')
+            logger.increment('rows_loaded', counts[0] + counts[1])
+            logger.log_message(f"DataFrame Upserted to Database ({counts[0]} new, {counts[1]} updated)", level='info')
+        else:
+            dumper = DBConnect.DataDumper(SqlConn.conn, SqlConn.engine)
+            with logger.span('db_load'):
+                row_count = dumper.copy_import(df_events, 'tbldaily_earthquake_data', 'raw', if_exists='replace')
+            if row_count is None:
+                raise RuntimeError('copy to raw.tbldaily_earthquake_data failed')
+            logger.increment('rows_loaded', row_count)
         
-        # Log confirmation
-        logger.log_message(f"DataFrame Dumped Datbase", level='info')
+            # Log confirmation
+            logger.log_message(f"DataFrame Dumped Datbase", level='info')
+
+        # reported / instrumental intensities of the bulletins, in their own table
+        with logger.span('db_load_intensities'):
+            intensity_count = load_intensities(df_data, SqlConn)
+        if intensity_count is None:
+            raise RuntimeError(f'copy to public.{INTENSITY_TABLE} failed')
+        logger.increment('intensity_rows_loaded', intensity_count)
+        logger.log_message("Loaded %d intensity rows", 'info', intensity_count)
+
+        if curate:
+            sp_executor = DBConnect.DatabaseStoredProcedureExecutor(SqlConn.environment_creds)
+            with logger.span('db_curate'):
+                if not sp_executor.execute_sp(CURATE_SP):
+                    raise RuntimeError('public.sp_insert_ph_eq_data() failed')
+            logger.log_message("Curated table and dashboard rollups refreshed", level='info')
+
+        return True
 
     except Exception as e:
         logger.log_message(f"Failed to Dump to Database: {e}", level='exception')
+        return False
     finally:
         SqlConn.disconnect()
         # pass
@@ -214,28 +447,49 @@ if __name__ == '__main__':
     url = 'https://earthquake.phivolcs.dost.gov.ph/'
     # url2 = 'https://earthquake.phivolcs.dost.gov.ph/EQLatest-Monthly/2024/2024_September.html'
 
+    detail_fetch_workers = 8  # number of bulletin pages fetched at the same time
+    page_cache = PageCache('page_cache', fresh_for=24 * 3600)  # bulletin pages rarely change once published
+    bulletin_archive = BulletinArchive(ARCHIVE_DIR)  # raw bulletins, kept for reparse_archive()
+
     logger = Logger()  # Initialize the logger instance
 
     # Scrape for the Main Page (Summary)
-    browser = initialize_scrapper(url, logger)
-    scraped_data = scrape_summary_data(browser, logger)
-    data_month, data_year, df_final = clean_summary_data(scraped_data, logger)
+    # plain http first, the Edge browser is only launched if that fails
+    with logger.span('summary'):
+        scraped_data = fetch_summary_data(url, logger)
+        if not scraped_data:
+            browser = initialize_scrapper(url, logger)
+            scraped_data = scrape_summary_data(browser, logger)
+            if browser:
+                browser.quit()
+    with logger.span('clean'):
+        data_month, data_year, df_final = clean_summary_data(scraped_data, logger)
     
     # Scrape for the Detailed Report
         # read csv (dummy)
         # df_final = pd.read_csv('scraped_data/earthquake_data_october_2024.csv')
-    df_final_with_details = scrape_detail_data(df_final, logger)
+    with logger.span('details'):
+        df_final_with_details = scrape_detail_data(df_final, logger, max_workers=detail_fetch_workers, cache=page_cache, archive=bulletin_archive)
+    with logger.span('parse'):
+        df_final_with_details = parse_detail_data(df_final_with_details, logger)
 
 
     # dumping to database
-    dump_to_database(df_final_with_details, logger)
+    with logger.span('load'):
+        dump_to_database(df_final_with_details, logger)
+    if logger.is_enabled('debug'):
+        logger.log_message("Connection pool stats: %s", 'debug', DBConnect.pool_stats())
+    DBConnect.dispose_engines()
     
     # print('\n')
     # print(df_final_with_details)
 
-    # Save the DataFrame to a CSV file
-    csv_file_path = f'scraped_data/earthquake_data_{data_month.lower()}_{data_year.lower()}.csv'
-    df_final_with_details.to_csv(csv_file_path, index=False)
+    # Merge the events into the Parquet catalogue (scraped_data/catalog/year=YYYY/month=M), replaces the month csv
+    with logger.span('catalog'):
+        catalog_rows = EventCatalog(CATALOG_DIR).write(df_final_with_details)
+    logger.log_message("Catalogue partitions for %s %s hold %d events", 'info', data_month, data_year, catalog_rows)
+
+    logger.summarize()
 
     
     
\ No newline at end of file
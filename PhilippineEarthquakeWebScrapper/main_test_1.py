@@ -1,14 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import urllib3
 
-# Suppress InsecureRequestWarning
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from modules.HttpClient import HttpClient
 
-# Step 1: Fetch the webpage with SSL verification disabled
+# Step 1: Fetch the webpage (shared client: SSL verification disabled, timeouts and retries)
 url = "https://earthquake.phivolcs.dost.gov.ph/"
-response = requests.get(url, verify=False)
+response = HttpClient.default().get(url)
 
 # Step 2: Parse the webpage content
 soup = BeautifulSoup(response.content, 'html.parser')
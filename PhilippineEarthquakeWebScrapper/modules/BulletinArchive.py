@@ -0,0 +1,172 @@
+"""
+BulletinArchive
+
+Content-addressed store of the raw bulletin html pages, so the bulletins can be parsed again after a parser change
+without scraping PHIVOLCS again.
+
+Each distinct page is kept once, compressed, under the sha256 of its raw content (the 'page_hash' column that the
+database tables and the Parquet catalogue store in place of the flattened bulletin text). An index maps every
+event_id to the hash of its latest page and its hlink.
+
+Pages are compressed with zstd when the zstandard package is installed, else with gzip. Both kinds can be read
+back whatever the compression of new pages is.
+
+Layout of the archive folder:
+    <root>/index.json                   -> event_id -> {hash, hlink, archived_at}
+    <root>/objects/<2 hex>/<hash>.zst   -> compressed raw page (.gz with gzip)
+"""
+
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIONS = ('zstd', 'gzip')
+_EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+
+
+def page_hash(content):
+    '''
+    Returns the sha256 hex digest of the raw page content, the key of the page in the archive.
+    '''
+    return hashlib.sha256(content).hexdigest()
+
+
+class BulletinArchive:
+    '''
+    Event id / hlink -> raw bulletin page store, deduplicated by content hash.
+
+    Sample usage:
+        archive = BulletinArchive('bulletin_archive')
+        df['page_hash'] = [archive.add(event_id, hlink, content) for ...]
+        archive.save()
+
+        for event_id, hlink, content_hash, content in archive.iter_pages():
+            ...
+    '''
+    def __init__(self, root='bulletin_archive', compression=None, level=None):
+        compression = compression or ('zstd' if zstandard is not None else 'gzip')
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Unknown compression {compression!r}, expected one of {COMPRESSIONS}')
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError('zstandard is not installed')
+
+        self.root = root
+        self.compression = compression
+        self.level = level if level is not None else (10 if compression == 'zstd' else 6)
+        self._index_path = os.path.join(root, 'index.json')
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        try:
+            with open(self._index_path, encoding='utf-8') as index_file:
+                self._index = json.load(index_file)
+        except (OSError, ValueError):
+            self._index = {}
+        self._by_hlink = {entry['hlink']: event_id for event_id, entry in self._index.items()}
+
+    def _blob_path(self, content_hash, compression):
+        return os.path.join(self.root, 'objects', content_hash[:2], content_hash + _EXTENSIONS[compression])
+
+    def _compress(self, content):
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(content)
+        return gzip.compress(content, compresslevel=self.level, mtime=0)
+
+    def put(self, content):
+        '''
+        Stores content unless a page with the same hash is already archived. Returns the hash.
+        '''
+        content_hash = page_hash(content)
+        if any(os.path.exists(self._blob_path(content_hash, compression)) for compression in COMPRESSIONS):
+            return content_hash
+
+        blob_path = self._blob_path(content_hash, self.compression)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f'{blob_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as blob_file:
+            blob_file.write(self._compress(content))
+        os.replace(tmp_path, blob_path)
+        return content_hash
+
+    def add(self, event_id, hlink, content):
+        '''
+        Archives the bulletin page of event_id and points the index at it. Returns the hash of the page.
+        '''
+        content_hash = self.put(content)
+        with self._lock:
+            self._index[event_id] = {'hash': content_hash, 'hlink': hlink, 'archived_at': time.time()}
+            self._by_hlink[hlink] = event_id
+        return content_hash
+
+    def get_blob(self, content_hash):
+        '''
+        Returns the raw page stored under content_hash, or None if it is not archived.
+        '''
+        for compression in COMPRESSIONS:
+            try:
+                with open(self._blob_path(content_hash, compression), 'rb') as blob_file:
+                    data = blob_file.read()
+            except OSError:
+                continue
+            if compression == 'gzip':
+                return gzip.decompress(data)
+            if zstandard is None:
+                raise ImportError(f'zstandard is needed to read the archived page {content_hash}')
+            return zstandard.ZstdDecompressor().decompress(data)
+        return None
+
+    def hash_of(self, event_id=None, hlink=None):
+        '''
+        Returns the hash of the latest page archived for event_id (or for hlink), or None.
+        '''
+        with self._lock:
+            if event_id is None:
+                event_id = self._by_hlink.get(hlink)
+            entry = self._index.get(event_id)
+        return entry['hash'] if entry else None
+
+    def get(self, event_id=None, hlink=None):
+        '''
+        Returns the latest raw page archived for event_id (or for hlink), or None.
+        '''
+        content_hash = self.hash_of(event_id, hlink)
+        return self.get_blob(content_hash) if content_hash else None
+
+    def iter_pages(self, event_ids=None):
+        '''
+        Yields (event_id, hlink, hash, raw page) for every archived event, or only for event_ids. Events whose page
+        is missing from the objects folder are skipped.
+        '''
+        with self._lock:
+            if event_ids is None:
+                entries = list(self._index.items())
+            else:
+                entries = [(event_id, self._index[event_id]) for event_id in event_ids if event_id in self._index]
+
+        for event_id, entry in entries:
+            content = self.get_blob(entry['hash'])
+            if content is not None:
+                yield event_id, entry['hlink'], entry['hash'], content
+
+    def save(self):
+        '''
+        Writes the index to disk. Call after a batch of add() calls.
+        '''
+        with self._lock:
+            tmp_path = f'{self._index_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as index_file:
+                json.dump(self._index, index_file)
+            os.replace(tmp_path, self._index_path)
+
+    def __len__(self):
+        return len(self._index)
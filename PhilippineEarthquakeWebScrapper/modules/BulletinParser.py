@@ -0,0 +1,84 @@
+"""
+BulletinParser
+
+Extracts the labelled fields of a PHIVOLCS earthquake information bulletin from its flattened text (the 'details'
+column produced by main.scrape_detail_data).
+
+Sample bulletin text (see earthquake_information.txt):
+    ... EARTHQUAKE INFORMATION NO. : 4 PHIVOLCS Building ... Date/Time : 02 Oct 2024 - 05:19:50 AM Location : ...
+    Depth of Focus (Km) : 035 Origin : TECTONIC Magnitude : Mw 6.1 Reported Intensities : ... Expecting Damage : NO
+    Expecting Aftershocks : YES Issued On : 03 October 2024 - 11:00 PM Prepared by : ...
+
+All patterns are compiled once and applied to the whole Series, so the raw to curated step in the database is a
+plain column copy.
+"""
+
+
+import re
+import pandas as pd
+
+
+class BulletinParser:
+    '''
+    Parses bulletin text into typed columns.
+
+    Sample usage:
+        df_fields = BulletinParser().parse(df['details'])
+        df = df.join(df_fields)
+    '''
+
+    # one capture group per field, in the order the fields appear in the bulletin
+    PATTERNS = {
+        'info_no': re.compile(r'EARTHQUAKE INFORMATION NO\. : (\d+)'),
+        'event_datetime': re.compile(r'Date/Time : (\d{1,2} \w+ \d{4} - \d{1,2}:\d{2}:\d{2} [AP]M)'),
+        'depth_of_focus_km': re.compile(r'Depth of Focus \(Km\) : (\d+)'),
+        'origin': re.compile(r'Origin : (.+?) Magnitude :'),
+        'magnitude_type': re.compile(r'Magnitude : ([A-Za-z]+) ?\d'),
+        'expecting_damage': re.compile(r'Expecting Damage : (.+?) Expecting Aftershocks :'),
+        'expecting_aftershocks': re.compile(r'Expecting Aftershocks : (.+?) Issued On :'),
+        'issued_on': re.compile(r'Issued On : (\d{1,2} \w+ \d{4} - \d{1,2}:\d{2} [AP]M)')
+    }
+
+    COLUMNS = list(PATTERNS)
+
+    def parse(self, details):
+        '''
+        Extracts the bulletin fields of every row of details (a pandas Series of bulletin text).
+
+        Returns a DataFrame with the same index as details and the columns:
+            info_no (Int64), event_datetime (datetime64, with seconds), depth_of_focus_km (Int64),
+            origin, magnitude_type ('Mw', 'ML', ...), expecting_damage, expecting_aftershocks (strings),
+            issued_on (datetime64)
+        Fields that are missing from a bulletin are left null.
+
+        event_datetime and issued_on are naive: they hold the Philippine local time as printed on the bulletin, with
+        no time zone attached (unlike the tz-aware origin_time of main.clean_summary_data), and are stored as is in
+        the 'timestamp without time zone' columns of the database.
+        '''
+        details = details.astype('string')
+
+        df = pd.DataFrame(index=details.index)
+        for column, pattern in self.PATTERNS.items():
+            df[column] = details.str.extract(pattern, expand=False)
+
+        df['info_no'] = pd.to_numeric(df['info_no'], errors='coerce').astype('Int64')
+        df['depth_of_focus_km'] = pd.to_numeric(df['depth_of_focus_km'], errors='coerce').astype('Int64')
+        df['event_datetime'] = self._to_datetime(df['event_datetime'], ['%d %b %Y - %I:%M:%S %p', '%d %B %Y - %I:%M:%S %p'])
+        df['issued_on'] = self._to_datetime(df['issued_on'], ['%d %B %Y - %I:%M %p', '%d %b %Y - %I:%M %p'])
+
+        for column in ['origin', 'magnitude_type', 'expecting_damage', 'expecting_aftershocks']:
+            df[column] = df[column].str.strip().astype(object).where(df[column].notna(), None)
+
+        return df
+
+    @staticmethod
+    def _to_datetime(values, formats):
+        # PHIVOLCS mixes abbreviated ('Oct', 'Sept') and full ('October') month names, try each format in turn
+        values = values.str.replace('Sept ', 'Sep ', regex=False)
+        result = pd.to_datetime(values, format=formats[0], errors='coerce')
+        for fmt in formats[1:]:
+            missing = result.isna() & values.notna()
+            if not missing.any():
+                break
+            result[missing] = pd.to_datetime(values[missing], format=fmt, errors='coerce')
+        return result
@@ -17,8 +17,8 @@ This module has four tools:
   user-configured 'db_config.json' file.
 
 (2) FileReader
-  - allows to read source files such as .csvs and .shp files and returns a pandas dataframe for analysis and/or 
-  transformation
+  - allows to read source files such as .csvs, .parquet and .shp files and returns a pandas dataframe for analysis and/or 
+  transformation. Many files can be read at once (glob pattern, in parallel) and large files in chunks
 
 (3) DataDumper
   - allows data to be stored in a database table. You need to first pass an active connection (from the Connector tool) 
@@ -47,28 +47,103 @@ Script Updates:
 (2) 2023-10-24: (not yet logged)
     ->  Class FileReader
         -> added a function to read an excel file data
+(3) 2026-10-18:
+    ->  Class DataDumper
+        -> added data_upsert() for incremental loads through a temporary staging table and INSERT ... ON CONFLICT
+        -> added copy_import() for bulk loads through COPY ... FROM STDIN
+           with a before_copy() hook that runs in the COPY transaction (e.g. deleting the rows being replaced)
+    ->  Class DBConnect
+        -> added get_engine(), pool_stats() and dispose_engines(): one pooled engine per database shared by all tools
+        -> Connector.connect() and DatabaseStoredProcedureExecutor.execute_sp() use the shared engine
+    ->  Class DatabaseExtractor
+        -> added stream_data() and stream_data_with_custom_query() to read large results in chunks (server-side cursor)
+           on their own pooled connection, closed when the stream ends or the consumer stops early
+        -> added get_events_within_radius(), get_events_in_bbox() and get_nearest_events() (PostGIS, GiST indexed)
+        -> added get_rollups() to read the daily/monthly dashboard rollup tables
+        -> added build_event_query(), get_events() and iter_events(): parameterized filters pushed down to the
+           database (time, magnitude, depth, bounding box, radius, province), ordering and keyset pagination
+    ->  Class DatabaseStoredProcedureExecutor
+        -> execute_sp() returns True if the procedure succeeded, False otherwise
+    ->  Class FileReader
+        -> added .parquet and .feather readers, dtype/columns options and a path + mtime keyed cache of read files
+        -> added read_files() (glob pattern, parallel reads in a process pool) and iter_file() (chunked reads)
 
 """
 
 
 import os
+import io
+import glob
 import json
+import time
+import itertools
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor
 import psycopg2
 from psycopg2 import sql
 from psycopg2 import extras
 import pandas as pd
 from sqlalchemy import create_engine, exc, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
 from urllib.parse import quote
 import geopandas as gpd
 
+# the (:lat, :lon) query point of the spatial queries of DatabaseExtractor
+_GEOG_POINT = 'ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography'
+
+# period -> (table, time column) of the dashboard rollups, and the dimensions they can be grouped by
+_ROLLUP_TABLES = {
+    'daily': ('tbldaily_ph_earthquake_rollup_daily', 'day'),
+    'monthly': ('tbldaily_ph_earthquake_rollup_monthly', 'month')
+}
+_ROLLUP_DIMENSIONS = ('province', 'magnitude_band', 'depth_band')
+
+# orderings of the event queries, each backed by an index ending with event_id (see Database/01 schema)
+_EVENT_ORDER_COLUMNS = ('origin_time', 'magnitude', 'depth_km', 'event_id')
+_EVENT_TIMEZONE = 'Asia/Manila'
+
+try:
+    import pyarrow as pa  # optional, only needed for Arrow record batch output and parquet/feather files
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+class _TimedQueuePool(QueuePool):
+    '''
+    QueuePool that keeps track of how long callers waited to check out a connection.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_count = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - start_time
+            self.checkout_count += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
 
 class DBConnect:
     '''
     Database connector class for data dumping.
     '''
 
+    # one pooled engine per database, shared by every Connector, DataDumper, DatabaseExtractor and
+    # DatabaseStoredProcedureExecutor of the process
+    _engines = {}
+    _engines_lock = threading.Lock()
+
     def __init__(self):
        self._version = 'v0.1.1'
 
@@ -78,6 +153,66 @@ class DBConnect:
         Get Version Information
         '''
         return self._version
+
+    @staticmethod
+    def get_engine(environment_creds, echo=False):
+        '''
+        Returns the process-wide pooled engine for the given environment credentials, creating it on first use.
+
+        Optional pool settings in the db_config.json environment (defaults in brackets):
+            "POOL_SIZE" (5), "MAX_OVERFLOW" (10), "POOL_TIMEOUT" (30 seconds), "POOL_RECYCLE" (1800 seconds),
+            "POOL_PRE_PING" (true)
+        '''
+        creds = environment_creds
+        key = (creds['USER'], creds['HOST'], str(creds['PORT']), creds['NAME'])
+        with DBConnect._engines_lock:
+            engine = DBConnect._engines.get(key)
+            if engine is None:
+                engine = create_engine(
+                    f"postgresql://{creds['USER']}:{quote(creds['PASS'])}@{creds['HOST']}:{creds['PORT']}/{creds['NAME']}",
+                    echo=echo,
+                    poolclass=_TimedQueuePool,
+                    pool_size=int(creds.get('POOL_SIZE', 5)),
+                    max_overflow=int(creds.get('MAX_OVERFLOW', 10)),
+                    pool_timeout=float(creds.get('POOL_TIMEOUT', 30)),
+                    pool_recycle=int(creds.get('POOL_RECYCLE', 1800)),
+                    pool_pre_ping=bool(creds.get('POOL_PRE_PING', True))
+                )
+                DBConnect._engines[key] = engine
+            return engine
+
+    @staticmethod
+    def pool_stats():
+        '''
+        Returns the connection pool statistics of every shared engine:
+        pool size, checked in/out and overflow connections, number of checkouts and time spent waiting for a connection.
+        '''
+        stats = []
+        for (user, host, port, name), engine in DBConnect._engines.items():
+            pool = engine.pool
+            stats.append({
+                'db_name': name,
+                'db_host': host,
+                'db_port': port,
+                'pool_size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'checkouts': pool.checkout_count,
+                'total_wait_time': round(pool.total_wait_time, 6),
+                'max_wait_time': round(pool.max_wait_time, 6)
+            })
+        return stats
+
+    @staticmethod
+    def dispose_engines():
+        '''
+        Closes every pooled connection. Call once when the process shuts down.
+        '''
+        with DBConnect._engines_lock:
+            for engine in DBConnect._engines.values():
+                engine.dispose()
+            DBConnect._engines.clear()
     
     ##########################################
     ## Connector Class
@@ -146,7 +281,7 @@ class DBConnect:
             try:
                 creds = self._environments[self.environment]
                 print(f"Connecting to {self.environment} database")
-                self.engine = create_engine(f"postgresql://{creds['USER']}:{quote(creds['PASS'])}@{creds['HOST']}:{creds['PORT']}/{creds['NAME']}" , echo=echo)
+                self.engine = DBConnect.get_engine(creds, echo=echo)  # shared pooled engine, see DBConnect.get_engine()
                 self.conn = self.engine.connect()
                 print(f"[Connect] Successfully connected to {self.environment} database ({creds['NAME']})")
                 self._status = f"Connected to {self.environment} ({creds['NAME']} on {creds['HOST']} port {creds['PORT']})"
@@ -157,10 +292,10 @@ class DBConnect:
 
         def disconnect(self):
             '''
-            Disconnects the current connect session, if it exists.
+            Disconnects the current connect session, if it exists. The connection goes back to the shared pool;
+            use DBConnect.dispose_engines() to close the pooled connections themselves.
             '''
             if self.conn:
-                self.engine.dispose()
                 self.conn.close()
                 self.engine = None
                 self.conn = None
@@ -176,35 +311,188 @@ class DBConnect:
     class FileReader:
         '''
         Generic file reader that collates all supported reader classes.
-        Supported file types: .shp, .csv
+        Supported file types: .shp, .csv, .xlsx, .xls, .xlsb, .parquet, .feather
+
+        Whole-file reads are cached in memory, keyed on the path, modification time and size of the file (and the
+        read options), so reading an unchanged file again is served from memory. The cache is shared by all
+        FileReader instances and keeps the max_cached_files most recently used files.
+
+        Sample usage:
+            reader = DBConnect.FileReader()
+            df = reader.read_file('scraped_data', 'earthquake_data_october_2024.csv', dtype={'magnitude': 'float32'})
+            df_all = reader.read_files('scraped_data/earthquake_data_*.csv', processes=4)
+            for df_chunk in reader.iter_file('scraped_data', 'earthquake_data_october_2024.csv', chunksize=50000):
+                ...
         '''
-        
-        def read_file(self, parent_folder, file_name, file_sheetname=None):
+
+        _cache = collections.OrderedDict()  # (path, mtime_ns, size, options) -> DataFrame
+        _cache_lock = threading.Lock()
+
+        def __init__(self, use_cache=True, max_cached_files=32):
+            self.use_cache = use_cache
+            self.max_cached_files = max_cached_files
+
+        def read_file(self, parent_folder, file_name, file_sheetname=None, dtype=None, columns=None):
             '''
             Read file based on the parent folder and file name values.
+                dtype: Optional column -> dtype schema (e.g. {'magnitude': 'float32', 'province': 'category'}),
+                       used instead of the default type inference.
+                columns: Optional list of the columns to read.
             '''
 
             file_extn = (list(os.path.splitext(file_name))[1]).lower()
             print(file_extn)
             print(file_sheetname)
-            
+
+            file_path = os.path.join(parent_folder, file_name)
+            cache_key = self._cache_key(file_path, file_sheetname, dtype, columns) if self.use_cache else None
+            if cache_key is not None:
+                with DBConnect.FileReader._cache_lock:
+                    df_cached = DBConnect.FileReader._cache.get(cache_key)
+                    if df_cached is not None:
+                        DBConnect.FileReader._cache.move_to_end(cache_key)
+                if df_cached is not None:
+                    return df_cached.copy()  # callers may modify their frame, the cached one stays intact
+
+            df = DBConnect.FileReader._read_path(file_path, file_sheetname, dtype, columns)
+            if df is not None and cache_key is not None:
+                self._cache_put(cache_key, df)
+                df = df.copy()
+            return df
+
+        def read_files(self, pattern, file_sheetname=None, dtype=None, columns=None, processes=None, source_column=None):
+            '''
+            Reads every file matching the glob pattern (e.g. 'scraped_data/earthquake_data_*.csv') and returns them
+            as one dataframe, in file name order. Files not in the cache are read in parallel in a process pool
+            (processes=None: one per CPU, processes=1: no pool).
+                source_column: Optional column name to store the path each row came from.
+            '''
+            file_paths = sorted(glob.glob(pattern))
+            if not file_paths:
+                print(f'No file matches {pattern}')
+                return None
+
+            frames = {}
+            to_read = []
+            for file_path in file_paths:
+                cache_key = self._cache_key(file_path, file_sheetname, dtype, columns) if self.use_cache else None
+                with DBConnect.FileReader._cache_lock:
+                    df_cached = DBConnect.FileReader._cache.get(cache_key) if cache_key is not None else None
+                if df_cached is not None:
+                    frames[file_path] = df_cached
+                else:
+                    to_read.append((file_path, cache_key))
+
+            if len(to_read) > 1 and processes != 1:
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    futures = [
+                        executor.submit(DBConnect.FileReader._read_path, file_path, file_sheetname, dtype, columns)
+                        for file_path, _ in to_read
+                    ]
+                    results = [future.result() for future in futures]
+            else:
+                results = [DBConnect.FileReader._read_path(file_path, file_sheetname, dtype, columns) for file_path, _ in to_read]
+
+            for (file_path, cache_key), df in zip(to_read, results):
+                if df is None:
+                    continue
+                frames[file_path] = df
+                if cache_key is not None:
+                    self._cache_put(cache_key, df)
+
+            data_frames = []
+            for file_path in file_paths:
+                if file_path not in frames:
+                    continue
+                df = frames[file_path]
+                data_frames.append(df.assign(**{source_column: file_path}) if source_column else df)
+
+            return pd.concat(data_frames, ignore_index=True) if data_frames else None
+
+        def iter_file(self, parent_folder, file_name, chunksize=100000, dtype=None, columns=None):
+            '''
+            Yields the file as dataframes of at most chunksize rows, so files larger than memory can be processed
+            (e.g. passed on to DataDumper.copy_import()). Supported for .csv, .parquet and .feather; other file types
+            are yielded as one dataframe. Chunks are not cached.
+            '''
+            file_extn = (list(os.path.splitext(file_name))[1]).lower()
+            file_path = os.path.join(parent_folder, file_name)
+
             match file_extn:
-                case '.shp':
-                    self._data = DBConnect._ShapeFileReader(os.path.join(parent_folder, file_name))
-                    return self._data.df
+                case '.csv':
+                    yield from pd.read_csv(file_path, chunksize=chunksize, dtype=dtype, usecols=columns)
+                case '.parquet':
+                    if pq is None:
+                        raise ImportError('pyarrow is required to read .parquet files')
+                    parquet_file = pq.ParquetFile(file_path)
+                    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+                        yield DBConnect.FileReader._apply_dtype(batch.to_pandas(), dtype)
+                case '.feather':
+                    if pa is None:
+                        raise ImportError('pyarrow is required to read .feather files')
+                    with pa.memory_map(file_path) as source:
+                        table = pa.ipc.open_file(source).read_all()
+                    if columns is not None:
+                        table = table.select(columns)
+                    for batch in table.to_batches(max_chunksize=chunksize):
+                        yield DBConnect.FileReader._apply_dtype(batch.to_pandas(), dtype)
+                case _:
+                    df = self.read_file(parent_folder, file_name, dtype=dtype, columns=columns)
+                    if df is not None:
+                        yield df
+
+        @staticmethod
+        def clear_cache():
+            with DBConnect.FileReader._cache_lock:
+                DBConnect.FileReader._cache.clear()
 
+        @staticmethod
+        def _cache_key(file_path, file_sheetname, dtype, columns):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+            options = (file_sheetname, repr(sorted(dtype.items(), key=str)) if isinstance(dtype, dict) else repr(dtype),
+                       tuple(columns) if columns is not None else None)
+            return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, options)
+
+        def _cache_put(self, cache_key, df):
+            with DBConnect.FileReader._cache_lock:
+                DBConnect.FileReader._cache[cache_key] = df
+                DBConnect.FileReader._cache.move_to_end(cache_key)
+                while len(DBConnect.FileReader._cache) > self.max_cached_files:
+                    DBConnect.FileReader._cache.popitem(last=False)
+
+        @staticmethod
+        def _apply_dtype(df, dtype):
+            if not dtype:
+                return df
+            if not isinstance(dtype, dict):
+                return df.astype(dtype)
+            return df.astype({column: column_type for column, column_type in dtype.items() if column in df.columns})
+
+        @staticmethod
+        def _read_path(file_path, file_sheetname=None, dtype=None, columns=None):
+            '''
+            Reads one file with the reader class of its extension. Runs in the worker processes of read_files().
+            '''
+            file_extn = os.path.splitext(file_path)[1].lower()
+
+            match file_extn:
+                case '.shp':
+                    df = DBConnect._ShapeFileReader(file_path).df
+                    return df[columns] if columns is not None else df
                 case '.csv':
-                    self._data = DBConnect._CsvFileReader(os.path.join(parent_folder, file_name))
-                    return self._data.df
-                case '.xlsx':
-                    self._data = DBConnect._ExcelFileReader(os.path.join(parent_folder, file_name), file_sheetname)
-                    return self._data.df
-                case '.xls':
-                    self._data = DBConnect._ExcelFileReader(os.path.join(parent_folder, file_name), file_sheetname)
-                    return self._data.df
-                case '.xlsb':
-                    self._data = DBConnect._ExcelFileReader(os.path.join(parent_folder, file_name), file_sheetname)
-                    return self._data.df
+                    return DBConnect._CsvFileReader(file_path, dtype, columns).df
+                case '.xlsx' | '.xls' | '.xlsb':
+                    df = DBConnect._ExcelFileReader(file_path, file_sheetname).df
+                    if isinstance(df, dict):
+                        return df  # several sheets
+                    return DBConnect.FileReader._apply_dtype(df[columns] if columns is not None else df, dtype)
+                case '.parquet':
+                    return DBConnect._ParquetFileReader(file_path, dtype, columns).df
+                case '.feather':
+                    return DBConnect._FeatherFileReader(file_path, dtype, columns).df
                 case _:
                     print('Unsupported File Type')
                     return None
@@ -220,8 +508,8 @@ class DBConnect:
         """
           Private class for reading csv files. Basically a reskin of pd.read_csv. 
         """
-        def __init__(self,file_path):
-            self.df = pd.read_csv(file_path)
+        def __init__(self, file_path, dtype=None, columns=None):
+            self.df = pd.read_csv(file_path, dtype=dtype, usecols=columns)
     
     class _ExcelFileReader:
         """
@@ -233,6 +521,24 @@ class DBConnect:
             else:
                 self.df = pd.read_excel(file_path, sheet_name=sheetname)
 
+    class _ParquetFileReader:
+        """
+          Private class for reading parquet files (e.g. the EventCatalog partitions). Basically a reskin of pd.read_parquet.
+        """
+        def __init__(self, file_path, dtype=None, columns=None):
+            if pq is None:
+                raise ImportError('pyarrow is required to read .parquet files')
+            self.df = DBConnect.FileReader._apply_dtype(pd.read_parquet(file_path, columns=columns), dtype)
+
+    class _FeatherFileReader:
+        """
+          Private class for reading feather (Arrow IPC) files. Basically a reskin of pd.read_feather.
+        """
+        def __init__(self, file_path, dtype=None, columns=None):
+            if pa is None:
+                raise ImportError('pyarrow is required to read .feather files')
+            self.df = DBConnect.FileReader._apply_dtype(pd.read_feather(file_path, columns=columns), dtype)
+
     ##############################################
     ## Database Dumping Class
     ##############################################
@@ -247,7 +553,7 @@ class DBConnect:
                 if connection and engine:
                     self.sql_conn = connection
                     self.sql_engine = engine
-                    Session = sessionmaker(bind=self.sql_engine)
+                    Session = sessionmaker(bind=self.sql_conn)  # reuse the passed connection, no extra pool checkout
                     self.session = Session()
                 else:
                     raise ValueError('Invalid Connection or Engine Values')
@@ -308,6 +614,226 @@ class DBConnect:
                 print('[Data Dumper Error] Error in Importing to SQL Table.')
                 print(e)
 
+        def copy_import(self, df_data, output_table_name, schema, pre=None, sp_callback=None, if_exists='append', before_copy=None):
+            """
+            Bulk import data to a table with PostgreSQL COPY ... FROM STDIN, which is much faster than to_sql for
+            large loads. Use a pandas dataframe, or an iterator of dataframes (e.g. pd.read_csv(..., chunksize=n)) as
+            input data; chunks are streamed one at a time so the whole data never has to fit in memory.
+
+            The table is created from the dataframe dtypes if it does not exist (see _postgres_type()).
+
+            if_exists:
+                - 'append': add the rows to the table.
+                - 'replace': load to a new table then swap it with the old one in the same transaction, so readers
+                  never see a missing or half loaded table.
+                - 'fail': raise an error if the table already exists.
+
+            The pre() and sp_callback() hooks work the same way as in data_import().
+
+            before_copy(cursor, target) is called on the COPY connection, in the same transaction, once the table
+            exists and before any row is copied. target is the sql.Identifier of the table being loaded. Use it for
+            changes that must commit or roll back together with the load, e.g. deleting the rows being replaced.
+
+            Returns the number of rows loaded, or None if the import failed.
+            """
+            try:
+                if pre:
+                    pre()
+
+                chunks = iter([df_data]) if isinstance(df_data, pd.DataFrame) else iter(df_data)
+                first_chunk = next(chunks, None)
+                if first_chunk is None and not before_copy:
+                    print('[Data Dumper] Nothing to load')
+                    return 0
+
+                raw_conn = self.sql_engine.raw_connection()
+                try:
+                    with raw_conn.cursor() as cursor:
+                        target = sql.Identifier(schema, output_table_name)
+                        cursor.execute('SELECT to_regclass(%s) IS NOT NULL;', (f'{schema}.{output_table_name}',))
+                        table_exists = cursor.fetchone()[0]
+
+                        if table_exists and if_exists == 'fail':
+                            raise ValueError(f'Table {schema}.{output_table_name} already exists')
+
+                        if first_chunk is None:
+                            # nothing to copy, but the before_copy() changes still apply (e.g. an event lost its rows)
+                            if table_exists and if_exists == 'append':
+                                before_copy(cursor, target)
+                            row_count = 0
+                        else:
+                            if if_exists == 'replace':
+                                load_table_name = f'{output_table_name}__new'
+                                load_target = sql.Identifier(schema, load_table_name)
+                                cursor.execute(sql.SQL('DROP TABLE IF EXISTS {};').format(load_target))
+                                self._create_table(cursor, load_target, first_chunk)
+                            else:
+                                load_target = target
+                                if not table_exists:
+                                    self._create_table(cursor, load_target, first_chunk)
+
+                            if before_copy:
+                                before_copy(cursor, load_target)
+
+                            row_count = self._copy_chunks(cursor, load_target, first_chunk, chunks)
+
+                            if if_exists == 'replace':
+                                cursor.execute(sql.SQL('DROP TABLE IF EXISTS {};').format(target))
+                                cursor.execute(sql.SQL('ALTER TABLE {} RENAME TO {};').format(load_target, sql.Identifier(output_table_name)))
+
+                    raw_conn.commit()
+                except Exception:
+                    raw_conn.rollback()
+                    raise
+                finally:
+                    raw_conn.close()
+
+                print(f'[Data Dumper] Copied {row_count} rows to SQL Table')
+
+                if sp_callback:
+                    sp_callback()
+
+                return row_count
+
+            except Exception as e:
+                print('[Data Dumper Error] Error in Copying to SQL Table.')
+                print(e)
+                return None
+
+        @staticmethod
+        def _postgres_type(dtype):
+            '''
+            Maps a pandas dtype to the PostgreSQL column type used by copy_import().
+            '''
+            if pd.api.types.is_bool_dtype(dtype):
+                return 'boolean'
+            if pd.api.types.is_integer_dtype(dtype):
+                return {1: 'smallint', 2: 'smallint', 4: 'integer'}.get(dtype.itemsize, 'bigint')
+            if pd.api.types.is_float_dtype(dtype):
+                return 'real' if dtype.itemsize == 4 else 'double precision'
+            if isinstance(dtype, pd.DatetimeTZDtype):
+                return 'timestamptz'
+            if pd.api.types.is_datetime64_dtype(dtype):
+                return 'timestamp'
+            if pd.api.types.is_timedelta64_dtype(dtype):
+                return 'interval'
+            return 'text'
+
+        @staticmethod
+        def _create_table(cursor, target, df, temporary=False):
+            '''
+            Creates target with one column per column of df. A temporary table is private to the session and dropped
+            at the end of the transaction.
+            '''
+            columns = sql.SQL(', ').join(
+                sql.SQL('{} {}').format(sql.Identifier(str(column)), sql.SQL(DBConnect.DataDumper._postgres_type(dtype)))
+                for column, dtype in df.dtypes.items()
+            )
+            if temporary:
+                cursor.execute(sql.SQL('CREATE TEMP TABLE {} ({}) ON COMMIT DROP;').format(target, columns))
+            else:
+                cursor.execute(sql.SQL('CREATE TABLE {} ({});').format(target, columns))
+
+        @staticmethod
+        def _copy_chunks(cursor, target, first_chunk, chunks):
+            '''
+            Streams first_chunk and the remaining chunks into target through COPY, one csv buffer per chunk.
+            '''
+            columns = [str(column) for column in first_chunk.columns]
+            copy_sql = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(
+                target, sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+            ).as_string(cursor)
+
+            row_count = 0
+            for chunk in itertools.chain([first_chunk], chunks):
+                buffer = io.StringIO()
+                chunk.to_csv(buffer, header=False, index=False, na_rep='\\N', columns=list(first_chunk.columns))
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+                row_count += len(chunk)
+            return row_count
+
+        def data_upsert(self, df_data, output_table_name, schema, key_columns, pre=None, sp_callback=None):
+            """
+            Insert new rows and update changed rows of a table, matching rows on key_columns. Use a pandas dataframe as
+            input data.
+
+            The data is first copied to a temporary staging table (private to the connection and dropped on commit, so
+            concurrent loads of the same table do not see each other's rows), then merged into the target table with
+            INSERT ... ON CONFLICT (key_columns) DO UPDATE, all in one transaction. Rows whose values did
+            not change are left untouched. The target table, its unique index on key_columns and any column missing
+            from it are created on the fly.
+
+            The pre() and sp_callback() hooks work the same way as in data_import().
+
+            Returns a tuple (inserted_count, updated_count), or None if the upsert failed.
+            """
+            try:
+                if pre:
+                    pre()
+
+                quote = self.sql_engine.dialect.identifier_preparer.quote
+                staging_table_name = f'{output_table_name}_staging'
+                target = f'{quote(schema)}.{quote(output_table_name)}'
+                staging = quote(staging_table_name)
+                columns = [str(column) for column in df_data.columns]
+                key_columns = list(key_columns)
+                non_key_columns = [column for column in columns if column not in key_columns]
+
+                # a key can only be affected once per INSERT ... ON CONFLICT, later rows win
+                df = pd.DataFrame(df_data).drop_duplicates(subset=key_columns, keep='last')
+
+                with self.sql_engine.begin() as conn:
+                    # staging is loaded with COPY on the same connection, so it is part of the upsert transaction
+                    with conn.connection.cursor() as cursor:
+                        staging_target = sql.Identifier(staging_table_name)
+                        self._create_table(cursor, staging_target, df, temporary=True)
+                        self._copy_chunks(cursor, staging_target, df, iter(()))
+
+                    conn.execute(text(f'CREATE TABLE IF NOT EXISTS {target} (LIKE {staging});'))
+                    # concurrent upserts of the same table merge one after the other (the index and column DDL below
+                    # would otherwise deadlock with the other upsert's INSERT); their COPY to staging still overlaps
+                    conn.execute(text(f'LOCK TABLE {target} IN SHARE ROW EXCLUSIVE MODE;'))
+
+                    # columns added to the frame since the target table was created
+                    target_columns = {row[0] for row in conn.execute(text(
+                        'SELECT column_name FROM information_schema.columns WHERE table_schema = :schema AND table_name = :target;'
+                    ), {'schema': schema, 'target': output_table_name})}
+                    for column, dtype in df.dtypes.items():
+                        if str(column) not in target_columns:
+                            conn.execute(text(f'ALTER TABLE {target} ADD COLUMN {quote(str(column))} {self._postgres_type(dtype)};'))
+
+                    key_list = ', '.join(quote(column) for column in key_columns)
+                    conn.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS {quote(f"ux_{output_table_name}_key")} ON {target} ({key_list});'))
+
+                    column_list = ', '.join(quote(column) for column in columns)
+                    if non_key_columns:
+                        update_set = ', '.join(f'{quote(column)} = EXCLUDED.{quote(column)}' for column in non_key_columns)
+                        changed = ' OR '.join(f'{target}.{quote(column)} IS DISTINCT FROM EXCLUDED.{quote(column)}' for column in non_key_columns)
+                        on_conflict = f'DO UPDATE SET {update_set} WHERE {changed}'
+                    else:
+                        on_conflict = 'DO NOTHING'
+
+                    # xmax = 0 only for freshly inserted rows, which lets us tell inserts from updates
+                    result = conn.execute(text(
+                        f'INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging} '
+                        f'ON CONFLICT ({key_list}) {on_conflict} RETURNING (xmax = 0) AS inserted;'
+                    )).fetchall()
+
+                inserted_count = sum(1 for row in result if row[0])
+                updated_count = len(result) - inserted_count
+                print(f'[Data Dumper] Upserted to SQL Table ({inserted_count} inserted, {updated_count} updated)')
+
+                if sp_callback:
+                    sp_callback()
+
+                return inserted_count, updated_count
+
+            except Exception as e:
+                print('[Data Dumper Error] Error in Upserting to SQL Table.')
+                print(e)
+                return None
+
 
     ###########################################
     ## Database Extractor Class
@@ -325,7 +851,7 @@ class DBConnect:
                 if connection and engine:
                     self.sql_conn = connection
                     self.sql_engine = engine
-                    Session = sessionmaker(bind=self.sql_engine)
+                    Session = sessionmaker(bind=self.sql_conn)  # reuse the passed connection, no extra pool checkout
                     self.session = Session()
                 else:
                     raise ValueError('Invalid Connection or Engine Values')
@@ -355,24 +881,16 @@ class DBConnect:
             return pd.DataFrame(result)
         
         
-        def get_data_with_custom_query(self, sql_query):
+        def get_data_with_custom_query(self, sql_query, params=None):
             '''
-            Extracts the data from a database using user defined sql query
+            Extracts the data from a database using user defined sql query. Values can be passed as bound parameters,
+            e.g. get_data_with_custom_query('SELECT * FROM t WHERE magnitude >= :magnitude', {'magnitude': 5})
             '''
 
             try:
-                result = self.sql_conn.execution_options(autocommit=True).execute(text(sql_query))
-                
-                data_frames = []
-                batch_size = 100000
-                while True:
-                    rows = result.fetchmany(batch_size)
-                    if not rows:
-                        break
-                    
-                    data_frames.append(pd.DataFrame(rows, columns=result.keys()))
+                data_frames = list(self.stream_data_with_custom_query(sql_query, params))
 
-                self.data = pd.concat(data_frames, ignore_index=True)
+                self.data = pd.concat(data_frames, ignore_index=True) if data_frames else pd.DataFrame()
 
             except Exception as e:
                 print(f"Error: {str(e)}")
@@ -380,6 +898,290 @@ class DBConnect:
 
             return self.data
 
+        def stream_data(self, table_name, schema, columns='*', chunksize=100000, as_arrow=False):
+            '''
+            Same as get_data(), but yields the rows in chunks of at most chunksize rows instead of one dataframe.
+            See stream_data_with_custom_query().
+            '''
+            query = f'SELECT {",".join(columns)} FROM {schema}.{table_name};'
+            return self.stream_data_with_custom_query(query, chunksize=chunksize, as_arrow=as_arrow)
+
+        def stream_data_with_custom_query(self, sql_query, params=None, chunksize=100000, as_arrow=False):
+            '''
+            Extracts the data from a database using user defined sql query, yielding pandas dataframes of at most
+            chunksize rows (or pyarrow RecordBatches if as_arrow=True).
+
+            Rows are read through a server-side cursor (stream_results), so only one chunk is held in memory at a
+            time, whatever the size of the result. Sample usage:
+
+                for df_chunk in extractor.stream_data_with_custom_query('SELECT * FROM public.tbldaily_ph_earthquake_data'):
+                    df_chunk.to_csv(out_file, header=False, index=False)
+            '''
+            if as_arrow and pa is None:
+                raise ImportError('pyarrow is required for as_arrow=True')
+
+            # own connection and no autocommit: the server-side cursor only lives as long as its transaction, and
+            # closing the connection (also when the consumer stops early and the generator is closed) ends both
+            stream_conn = self.sql_engine.connect()
+            try:
+                result = stream_conn.execution_options(stream_results=True, max_row_buffer=chunksize).execute(text(sql_query), params or {})
+                columns = list(result.keys())
+                while True:
+                    rows = result.fetchmany(chunksize)
+                    if not rows:
+                        break
+
+                    df_chunk = pd.DataFrame(rows, columns=columns)
+                    yield pa.RecordBatch.from_pandas(df_chunk, preserve_index=False) if as_arrow else df_chunk
+                result.close()
+            finally:
+                stream_conn.close()  # rolls back the read transaction and returns the connection to the pool
+
+
+        ###########################################
+        ## Spatial queries (PostGIS)
+        ###########################################
+        # The curated table keeps the epicenter in geo_point geometry(Point, 4326) with GiST indexes on geo_point
+        # (bounding box) and geo_point::geography (distances in meters), see Database/01 schema. The in-memory
+        # equivalent for DataFrames is modules.SpatialIndex.
+
+        def get_events_within_radius(self, lat, lon, radius_km, table_name='tbldaily_ph_earthquake_data', schema='public', columns='*'):
+            '''
+            Returns the events within radius_km of (lat, lon), closest first, with their distance in a 'distance_km' column.
+            '''
+            query = f'''
+                SELECT {",".join(columns)}, ST_Distance(geo_point::geography, {_GEOG_POINT}) / 1000 AS distance_km
+                FROM {schema}.{table_name}
+                WHERE ST_DWithin(geo_point::geography, {_GEOG_POINT}, :radius_m)
+                ORDER BY distance_km;
+            '''
+            return self.get_data_with_custom_query(query, {'lat': lat, 'lon': lon, 'radius_m': radius_km * 1000})
+
+        def get_events_in_bbox(self, min_lat, min_lon, max_lat, max_lon, table_name='tbldaily_ph_earthquake_data', schema='public', columns='*'):
+            '''
+            Returns the events inside the bounding box (edges included).
+            '''
+            query = f'''
+                SELECT {",".join(columns)}
+                FROM {schema}.{table_name}
+                WHERE geo_point && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326);
+            '''
+            return self.get_data_with_custom_query(query, {'min_lat': min_lat, 'min_lon': min_lon, 'max_lat': max_lat, 'max_lon': max_lon})
+
+        def get_nearest_events(self, lat, lon, k=10, table_name='tbldaily_ph_earthquake_data', schema='public', columns='*'):
+            '''
+            Returns the k events closest to (lat, lon), closest first, with their distance in a 'distance_km' column.
+            Uses the index-assisted KNN ordering (<->) of the geography index, so only about k rows are read.
+            '''
+            query = f'''
+                SELECT {",".join(columns)}, ST_Distance(geo_point::geography, {_GEOG_POINT}) / 1000 AS distance_km
+                FROM {schema}.{table_name}
+                WHERE geo_point IS NOT NULL
+                ORDER BY geo_point::geography <-> {_GEOG_POINT}
+                LIMIT :k;
+            '''
+            return self.get_data_with_custom_query(query, {'lat': lat, 'lon': lon, 'k': int(k)})
+
+
+        ###########################################
+        ## Dashboard rollups
+        ###########################################
+        # Event counts per day / month, province, magnitude band and depth band, kept up to date by
+        # public.sp_refresh_ph_eq_rollups() for the days each load changed (see Database/01 schema).
+
+        def get_rollups(self, period='daily', start=None, end=None, provinces=None, group_by=_ROLLUP_DIMENSIONS, schema='public'):
+            '''
+            Returns the pre-aggregated event counts of the dashboard, without scanning the events.
+
+            Parameters:
+                period: 'daily' (a 'day' column) or 'monthly' (a 'month' column, first day of the month).
+                start, end: Date range, start included and end excluded.
+                provinces: Only these provinces (events without a province are under 'Unknown').
+                group_by: Dimensions to keep, among 'province', 'magnitude_band' and 'depth_band'. The counts are
+                          summed over the others, e.g. group_by=['magnitude_band'] gives the counts per period and band.
+
+            Returns:
+                DataFrame: The period and group_by columns, event_count, max_magnitude, avg_magnitude and avg_depth_km.
+            '''
+            if period not in _ROLLUP_TABLES:
+                raise ValueError(f'Unknown period {period!r}, expected one of {list(_ROLLUP_TABLES)}')
+            unknown_dimensions = [dimension for dimension in group_by if dimension not in _ROLLUP_DIMENSIONS]
+            if unknown_dimensions:
+                raise ValueError(f'Unknown rollup dimensions {unknown_dimensions}, expected some of {_ROLLUP_DIMENSIONS}')
+
+            table_name, time_column = _ROLLUP_TABLES[period]
+            group_columns = ', '.join([time_column] + list(group_by))
+
+            conditions = []
+            params = {}
+            if start is not None:
+                conditions.append(f'{time_column} >= :start')
+                params['start'] = start
+            if end is not None:
+                conditions.append(f'{time_column} < :end')
+                params['end'] = end
+            if provinces is not None:
+                conditions.append('province = ANY(:provinces)')
+                params['provinces'] = list(provinces)
+            where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+
+            query = f'''
+                SELECT {group_columns},
+                    sum(event_count)::int AS event_count,
+                    max(max_magnitude) AS max_magnitude,
+                    (sum(sum_magnitude) / sum(event_count))::double precision AS avg_magnitude,
+                    (sum(sum_depth_km) / sum(event_count))::double precision AS avg_depth_km
+                FROM {schema}.{table_name}
+                {where}
+                GROUP BY {group_columns}
+                ORDER BY {group_columns};
+            '''
+            return self.get_data_with_custom_query(query, params)
+
+
+        ###########################################
+        ## Event queries (filters pushed down)
+        ###########################################
+        # Every filter is a bound parameter and every identifier is quoted, so the values never end up in the SQL
+        # text. Pages are read with keyset pagination: WHERE (order column, event_id) > (last row of the previous
+        # page), which walks the index instead of skipping OFFSET rows.
+
+        def build_event_query(self, columns='*', start=None, end=None, min_magnitude=None, max_magnitude=None,
+                              min_depth=None, max_depth=None, bbox=None, radius=None, provinces=None,
+                              order_by='origin_time', descending=False, limit=None, after=None,
+                              table_name='tbldaily_ph_earthquake_data', schema='public'):
+            '''
+            Builds the SELECT of get_events(). Returns (sql_query, params), ready for get_data_with_custom_query().
+
+            Parameters:
+                columns: List of columns, or '*'.
+                start, end: Origin time range, start included and end excluded. Strings or timestamps; naive values
+                            are taken as Philippine time.
+                min_magnitude, max_magnitude, min_depth, max_depth: Magnitude and depth (km) ranges, bounds included.
+                bbox: (min_lat, min_lon, max_lat, max_lon), edges included.
+                radius: (lat, lon, radius_km), adds a 'distance_km' column.
+                provinces: Only these provinces.
+                order_by: One of 'origin_time', 'magnitude', 'depth_km' or 'event_id'. Ties are ordered by event_id.
+                descending: Order from the latest / largest / deepest.
+                limit: Maximum number of rows.
+                after: (order_by value, event_id) of the last row of the previous page, see iter_events().
+            '''
+            if order_by not in _EVENT_ORDER_COLUMNS:
+                raise ValueError(f'Unknown order_by {order_by!r}, expected one of {_EVENT_ORDER_COLUMNS}')
+
+            quote = self.sql_engine.dialect.identifier_preparer.quote
+            conditions = []
+            params = {}
+
+            def add_range(column, low, high, low_operator='>=', high_operator='<='):
+                if low is not None:
+                    conditions.append(f'{quote(column)} {low_operator} :{column}_low')
+                    params[f'{column}_low'] = low
+                if high is not None:
+                    conditions.append(f'{quote(column)} {high_operator} :{column}_high')
+                    params[f'{column}_high'] = high
+
+            add_range('origin_time', self._event_time(start), self._event_time(end), high_operator='<')
+            add_range('magnitude', min_magnitude, max_magnitude)
+            add_range('depth_km', min_depth, max_depth)
+
+            if bbox is not None:
+                conditions.append('geo_point && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)')
+                params.update(zip(('min_lat', 'min_lon', 'max_lat', 'max_lon'), bbox))
+            if radius is not None:
+                lat, lon, radius_km = radius
+                conditions.append(f'ST_DWithin(geo_point::geography, {_GEOG_POINT}, :radius_m)')
+                params.update({'lat': lat, 'lon': lon, 'radius_m': radius_km * 1000})
+            if provinces is not None:
+                conditions.append('province = ANY(:provinces)')
+                params['provinces'] = list(provinces)
+
+            order_column = quote(order_by)
+            direction = 'DESC' if descending else 'ASC'
+            if order_by == 'event_id':
+                order_key = 'event_id'
+                order_clause = f'event_id {direction}'
+            else:
+                # keyset pagination cannot step over NULLs, rows without a value of the ordering column are left out
+                conditions.append(f'{order_column} IS NOT NULL')
+                order_key = f'({order_column}, event_id)'
+                order_clause = f'{order_column} {direction}, event_id {direction}'
+            if after is not None:
+                operator = '<' if descending else '>'
+                if order_by == 'event_id':
+                    conditions.append(f'event_id {operator} :after_event_id')
+                    params['after_event_id'] = after
+                else:
+                    conditions.append(f'{order_key} {operator} (:after_value, :after_event_id)')
+                    params.update({'after_value': after[0], 'after_event_id': after[1]})
+
+            if columns == '*':
+                select_list = '*'
+            else:
+                select_list = ', '.join(quote(column) for column in columns)
+            if radius is not None:
+                select_list += f', ST_Distance(geo_point::geography, {_GEOG_POINT}) / 1000 AS distance_km'
+
+            where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+            query = f'''
+                SELECT {select_list}
+                FROM {quote(schema)}.{quote(table_name)}
+                {where}
+                ORDER BY {order_clause}
+                {'LIMIT :limit' if limit is not None else ''};
+            '''
+            if limit is not None:
+                params['limit'] = int(limit)
+            return query, params
+
+        def get_events(self, **filters):
+            '''
+            Returns the events matching the filters of build_event_query(), e.g.
+
+                extractor.get_events(columns=['event_id', 'origin_time', 'magnitude'], provinces=['Surigao Del Sur'],
+                                     start='2024-01-01', min_magnitude=4, order_by='magnitude', descending=True, limit=20)
+            '''
+            query, params = self.build_event_query(**filters)
+            return self.get_data_with_custom_query(query, params)
+
+        def iter_events(self, page_size=10000, **filters):
+            '''
+            Yields the events matching the filters of build_event_query() page by page (dataframes of at most
+            page_size rows), with keyset pagination. The event_id and ordering columns are always selected. A limit
+            in the filters caps the total number of rows yielded.
+            '''
+            order_by = filters.get('order_by', 'origin_time')
+            columns = filters.get('columns', '*')
+            if columns != '*':
+                filters['columns'] = list(columns) + [column for column in (order_by, 'event_id') if column not in columns]
+
+            after = filters.pop('after', None)
+            remaining = filters.pop('limit', None)
+            while remaining is None or remaining > 0:
+                request_size = page_size if remaining is None else min(page_size, remaining)
+                df_page = self.get_events(limit=request_size, after=after, **filters)
+                if df_page is None:
+                    raise RuntimeError('event query failed')
+                if df_page.empty:
+                    return
+
+                yield df_page
+                if remaining is not None:
+                    remaining -= len(df_page)
+                if len(df_page) < request_size:
+                    return
+                last_row = df_page.iloc[-1]
+                after = last_row['event_id'] if order_by == 'event_id' else (last_row[order_by], last_row['event_id'])
+
+        @staticmethod
+        def _event_time(value):
+            if value is None:
+                return None
+            timestamp = pd.Timestamp(value)
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.tz_localize(_EVENT_TIMEZONE)
+            return timestamp.to_pydatetime()
+
 
     ###########################################
     ## Database Stored Procedure Executor
@@ -395,20 +1197,18 @@ class DBConnect:
                 self.password = environment_creds['PASS']
                 self.host = environment_creds['HOST']
                 self.port = environment_creds['PORT']
+                self.sql_engine = DBConnect.get_engine(environment_creds)
                 
             except ValueError as ve:
                 print(ve)
 
 
         def execute_sp(self, sp_name):
-             # Define the connection string
-            conn = psycopg2.connect(
-                dbname = self.dbname,
-                user = self.user,
-                password = self.password,
-                host = self.host,
-                port = self.port
-            )
+            '''
+            Executes sp_name (e.g. 'call public.sp_insert_ph_eq_data();'). Returns True if it succeeded.
+            '''
+            # Borrow a psycopg2 connection from the shared pool instead of opening a new one
+            conn = self.sql_engine.raw_connection()
 
             # Create a cursor object
             cursor = conn.cursor()
@@ -419,12 +1219,14 @@ class DBConnect:
 
                 # Commit the transaction if the procedure modifies data
                 conn.commit()
+                return True
             except psycopg2.Error as e:
                 # Rollback the transaction in case of an error
                 conn.rollback()
                 print(f"Error: {e}")
+                return False
             finally:
-                # Close the cursor and connection
+                # Close the cursor and return the connection to the pool
                 cursor.close()
                 conn.close()
             
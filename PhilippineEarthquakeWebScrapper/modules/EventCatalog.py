@@ -0,0 +1,150 @@
+"""
+EventCatalog
+
+Columnar (Parquet) store of the scraped events, partitioned by year and month of the origin time, replacing the
+per-month csv files of scraped_data.
+
+Layout of the catalogue folder (hive partitioning, readable by pyarrow, pandas, DuckDB, Spark, ...):
+    <root>/year=2024/month=10/events.parquet
+
+Writes are idempotent: the new rows are merged into the partitions they belong to by event_id (the latest row of
+an event wins), so re-running a month or a backfill never duplicates events. Each partition file is replaced
+atomically. The bulky bulletin text ('details') is not stored, its parsed fields are.
+
+Reads only open the partitions and columns they need, and the time range / magnitude filters are pushed down to
+the Parquet row group statistics.
+"""
+
+
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+
+PARTITION_TIMEZONE = 'Asia/Manila'
+
+
+class EventCatalog:
+    '''
+    Year/month partitioned Parquet catalogue of events.
+
+    Sample usage:
+        catalog = EventCatalog('scraped_data/catalog')
+        catalog.write(df_events)
+        df_strong = catalog.read(columns=['event_id', 'origin_time', 'magnitude', 'province'],
+                                 start='2024-01-01', end='2024-07-01', min_magnitude=5)
+    '''
+    def __init__(self, root='scraped_data/catalog', key_column='event_id', time_column='origin_time',
+                 exclude_columns=('details',), compression='zstd'):
+        if pa is None:
+            raise ImportError('pyarrow is required for EventCatalog')
+
+        self.root = root
+        self.key_column = key_column
+        self.time_column = time_column
+        self.exclude_columns = list(exclude_columns)
+        self.compression = compression
+
+    def _partition_path(self, year, month):
+        return os.path.join(self.root, f'year={year}', f'month={month}', 'events.parquet')
+
+    def write(self, df_data):
+        '''
+        Merges the rows of df_data into the catalogue, replacing the stored rows with the same event_id.
+
+        Returns the number of rows written. Rows without an origin time cannot be placed in a partition and are
+        skipped.
+        '''
+        df_data = df_data.drop(columns=[column for column in self.exclude_columns if column in df_data.columns])
+        df_data = df_data[df_data[self.time_column].notna()]
+
+        local_time = df_data[self.time_column]
+        if local_time.dt.tz is not None:
+            local_time = local_time.dt.tz_convert(PARTITION_TIMEZONE)
+
+        row_count = 0
+        for (year, month), df_partition in df_data.groupby([local_time.dt.year, local_time.dt.month], sort=True):
+            partition_path = self._partition_path(year, month)
+
+            if os.path.exists(partition_path):
+                df_stored = pd.read_parquet(partition_path)
+                df_partition = pd.concat([df_stored, df_partition], ignore_index=True)
+
+            # merged categoricals fall back to object: the other columns get the dtypes of the new rows back, the
+            # categoricals are rebuilt from the merged values (casting to the new rows' categories would null every
+            # stored value missing from this batch)
+            dtypes = {column: dtype for column, dtype in df_data.dtypes.items() if not isinstance(dtype, pd.CategoricalDtype)}
+            categorical_columns = [column for column in df_data.columns if column not in dtypes]
+            df_partition = (
+                df_partition
+                .drop_duplicates(subset=[self.key_column], keep='last')
+                .sort_values(self.time_column, kind='stable')
+                .astype(dtypes)
+                .astype({column: 'category' for column in categorical_columns})
+                .reset_index(drop=True)
+            )
+
+            os.makedirs(os.path.dirname(partition_path), exist_ok=True)
+            tmp_path = f'{partition_path}.tmp'
+            df_partition.to_parquet(tmp_path, engine='pyarrow', compression=self.compression, index=False)
+            os.replace(tmp_path, partition_path)  # readers never see a half written partition
+            row_count += len(df_partition)
+
+        return row_count
+
+    def _dataset(self):
+        return ds.dataset(self.root, format='parquet', partitioning='hive')
+
+    def read(self, columns=None, start=None, end=None, min_magnitude=None, max_magnitude=None, extra_filter=None):
+        '''
+        Reads events from the catalogue.
+
+        Parameters:
+            columns: Columns to read (default: all stored columns, without the year/month partition keys).
+            start, end: Origin time range, start included and end excluded. Strings or timestamps; naive values
+                        are taken as Philippine time.
+            min_magnitude, max_magnitude: Magnitude range, both included.
+            extra_filter: Extra pyarrow.dataset expression, e.g. ds.field('province') == 'Surigao Del Sur'.
+
+        Returns:
+            DataFrame: The matching events, sorted by origin time (if it is one of the columns).
+        '''
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+
+        dataset = self._dataset()
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name not in ('year', 'month')]
+
+        expression = ds.scalar(True)
+        if start is not None:
+            start = self._timestamp(start)
+            expression &= (ds.field('year') > start.year) | ((ds.field('year') == start.year) & (ds.field('month') >= start.month))
+            expression &= ds.field(self.time_column) >= pa.scalar(start, type=dataset.schema.field(self.time_column).type)
+        if end is not None:
+            end = self._timestamp(end)
+            expression &= (ds.field('year') < end.year) | ((ds.field('year') == end.year) & (ds.field('month') <= end.month))
+            expression &= ds.field(self.time_column) < pa.scalar(end, type=dataset.schema.field(self.time_column).type)
+        if min_magnitude is not None:
+            expression &= ds.field('magnitude') >= min_magnitude
+        if max_magnitude is not None:
+            expression &= ds.field('magnitude') <= max_magnitude
+        if extra_filter is not None:
+            expression &= extra_filter
+
+        df_events = dataset.to_table(columns=columns, filter=expression).to_pandas()
+        if self.time_column in df_events.columns:
+            df_events = df_events.sort_values(self.time_column, kind='stable', ignore_index=True)
+        return df_events
+
+    @staticmethod
+    def _timestamp(value):
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            return timestamp.tz_localize(PARTITION_TIMEZONE)
+        return timestamp.tz_convert(PARTITION_TIMEZONE)
@@ -0,0 +1,169 @@
+"""
+HtmlExtractor
+
+Extraction of the summary table rows and the bulletin text out of the PHIVOLCS pages, with a pluggable parser
+backend:
+
+    'lxml' -> libxml2 (C) parser, several times faster than html.parser
+    'bs4'  -> BeautifulSoup with the pure-Python html.parser, the original implementation and the fallback when lxml
+              is not installed
+
+Both backends return the same summary rows, and the same bulletin text in 'compat' mode:
+    compat   -> every text node of the page, whitespace collapsed (what soup.get_text() + re.sub(r'\\s+', ' ') gave),
+                so stored 'details' values do not change
+    targeted -> only the "EARTHQUAKE INFORMATION NO." heading and the 'Label : value' rows of the bulletin table,
+                which is all that modules.BulletinParser and modules.IntensityParser read
+
+The summary extraction keeps every row of the document rather than only the data table (table[3]): the data table
+is nearly the whole page, and main.clean_summary_data needs the month header and year rows around it.
+
+Run benchmarks/bench_html_extraction.py for the pages/s of every backend over the recorded pages.
+"""
+
+
+import re
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+BACKENDS = ('lxml', 'bs4')
+BULLETIN_MODES = ('compat', 'targeted')
+
+WHITESPACE = re.compile(r'\s+')
+
+# all text nodes outside style/script/template (bs4 get_text() skips those too), in document order; comments are
+# not text nodes
+_LXML_TEXT_XPATH = '//text()[not(parent::style) and not(parent::script) and not(parent::template)]'
+_LXML_HEADING_XPATH = '//*[contains(text(), "EARTHQUAKE INFORMATION NO")]'
+
+
+def default_backend():
+    return 'lxml' if lxml is not None else 'bs4'
+
+
+def _collapse(text):
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def _decode(content):
+    # without a declared charset libxml2 assumes latin-1 while bs4 detects utf-8, decode those pages the bs4 way
+    if isinstance(content, bytes) and b'charset' not in content[:2048].lower():
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+    return content
+
+
+class HtmlExtractor:
+    '''
+    Extracts the summary rows and bulletin text of PHIVOLCS pages with the chosen backend.
+
+    Sample usage:
+        extractor = HtmlExtractor()                      # lxml if installed, else bs4
+        rows = extractor.summary_rows(page_source, url)
+        text = extractor.bulletin_text(content)          # same text as the bs4 backend
+        text = HtmlExtractor(bulletin_mode='targeted').bulletin_text(content)
+    '''
+    def __init__(self, backend=None, bulletin_mode='compat'):
+        backend = backend or default_backend()
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown backend {backend!r}, expected one of {BACKENDS}')
+        if backend == 'lxml' and lxml is None:
+            raise ImportError('lxml is not installed')
+        if bulletin_mode not in BULLETIN_MODES:
+            raise ValueError(f'Unknown bulletin mode {bulletin_mode!r}, expected one of {BULLETIN_MODES}')
+        self.backend = backend
+        self.bulletin_mode = bulletin_mode
+
+    ##########################################
+    ## Summary page
+    ##########################################
+
+    def summary_rows(self, page_source, base_url):
+        '''
+        Returns a list of lists with the cell texts of every row of the page, with the href following the text of
+        each linked cell (see main.parse_summary_table).
+        '''
+        if self.backend == 'lxml':
+            return self._summary_rows_lxml(page_source, base_url)
+        return self._summary_rows_bs4(page_source, base_url)
+
+    @staticmethod
+    def _link(base_url, href):
+        # browsers treat backslashes in http links as slashes, PHIVOLCS uses them in its bulletin links
+        return urljoin(base_url, (href or '').replace('\\', '/'))
+
+    def _summary_rows_bs4(self, page_source, base_url):
+        soup = BeautifulSoup(page_source, 'html.parser')
+        data = []
+        for tr in soup.find_all('tr'):
+            row = []
+            for td in tr.find_all('td'):
+                a_element = td.find('a')
+                if a_element:
+                    row.append(' '.join(a_element.get_text().split()))
+                    row.append(self._link(base_url, a_element.get('href', '')))
+                else:
+                    row.append(' '.join(td.get_text().split()))
+            data.append(row)
+        return data
+
+    def _summary_rows_lxml(self, page_source, base_url):
+        root = lxml.html.fromstring(_decode(page_source))
+        data = []
+        for tr in root.iter('tr'):
+            row = []
+            for td in tr.iter('td'):
+                a_element = next(td.iter('a'), None)
+                if a_element is not None:
+                    row.append(' '.join(a_element.text_content().split()))
+                    row.append(self._link(base_url, a_element.get('href', '')))
+                else:
+                    row.append(' '.join(td.text_content().split()))
+            data.append(row)
+        return data
+
+    ##########################################
+    ## Bulletin page
+    ##########################################
+
+    def bulletin_text(self, content):
+        '''
+        Flattens a bulletin page into a single line of text (the 'details' column), see the module docstring for
+        the compat and targeted modes.
+        '''
+        if self.backend == 'lxml':
+            root = lxml.html.fromstring(_decode(content))
+            if self.bulletin_mode == 'targeted':
+                return self._bulletin_fields_lxml(root)
+            return _collapse(' '.join(root.xpath(_LXML_TEXT_XPATH)))
+
+        soup = BeautifulSoup(content, 'html.parser')
+        if self.bulletin_mode == 'targeted':
+            return self._bulletin_fields_bs4(soup)
+        return _collapse(soup.get_text(separator='\n'))
+
+    @staticmethod
+    def _bulletin_fields_lxml(root):
+        parts = [' '.join(heading.text_content().split()) for heading in root.xpath(_LXML_HEADING_XPATH)[:1]]
+        for tr in root.iter('tr'):
+            cells = [td for td in tr if td.tag == 'td']
+            if len(cells) >= 3 and cells[1].text_content().strip() == ':':
+                parts.append(f'{cells[0].text_content()} : {cells[2].text_content()}')
+        return _collapse(' '.join(parts))
+
+    @staticmethod
+    def _bulletin_fields_bs4(soup):
+        heading = soup.find(string=re.compile('EARTHQUAKE INFORMATION NO'))
+        parts = [' '.join(heading.split())] if heading else []
+        for tr in soup.find_all('tr'):
+            cells = tr.find_all('td', recursive=False)
+            if len(cells) >= 3 and cells[1].get_text().strip() == ':':
+                parts.append(f'{cells[0].get_text()} : {cells[2].get_text()}')
+        return _collapse(' '.join(parts))
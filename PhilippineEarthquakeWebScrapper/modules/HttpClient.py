@@ -0,0 +1,164 @@
+"""
+HttpClient
+
+Shared HTTP layer for every PHIVOLCS request (summary page, monthly archives, bulletins).
+
+- one requests.Session with a pooled keep-alive connection adapter, so bulletins reuse open connections instead
+  of doing a TCP + TLS handshake each
+- compressed responses (Accept-Encoding: gzip, deflate)
+- a (connect, read) timeout on every request
+- retries of failed requests (requests.RequestException: connection errors, timeouts, ...), 429 and 5xx with
+  exponential backoff and full jitter, honouring the Retry-After header; any other exception is a bug and is
+  raised at once, without a retry and without touching the concurrency limit
+- an adaptive concurrency limit (AIMD): the number of requests in flight grows by about one per round trip while
+  the site answers normally and is halved on a 429/5xx/timeout, so throughput settles at what the site tolerates
+
+The retries are done here rather than by urllib3's Retry, so that every failed attempt reaches the limiter.
+
+Sample usage:
+    client = HttpClient.default()
+    response = client.get('https://earthquake.phivolcs.dost.gov.ph/')
+"""
+
+
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36 Edg/129.0.0.0'
+
+# answers that mean "slow down / try again later"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class AdaptiveLimiter:
+    '''
+    Limits the number of requests in flight, with additive increase / multiplicative decrease of the limit.
+
+    Sample usage:
+        limiter.acquire()
+        try:
+            response = session.get(url)
+        finally:
+            limiter.release(throttled=response.status_code in RETRY_STATUSES)
+    '''
+    def __init__(self, initial=4, minimum=1, maximum=16, decrease_factor=0.5, cooldown=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown  # one decrease per cooldown seconds, a burst of failures counts once
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False, adjust=True):
+        '''
+        Frees the slot of a finished request. With adjust=False the limit is left as is (the request failed for a
+        reason that says nothing about the load of the site).
+        '''
+        with self._condition:
+            self.in_flight -= 1
+            if adjust:
+                now = time.monotonic()
+                if throttled:
+                    if now - self._last_decrease >= self.cooldown:
+                        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                        self._last_decrease = now
+                else:
+                    # +1 once every 'limit' successful requests, i.e. about once per round trip
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class HttpClient:
+    '''
+    Thread-safe HTTP client with keep-alive, timeouts, jittered retries and an adaptive concurrency limit.
+    '''
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, timeout=(5, 30), verify=False, retries=3, backoff_factor=0.5, max_backoff=30,
+                 pool_maxsize=16, limiter=None, user_agent=USER_AGENT):
+        self.timeout = timeout
+        self.verify = verify  # PHIVOLCS certificate chain does not validate, hence verify=False by default
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.limiter = limiter if limiter is not None else AdaptiveLimiter(maximum=pool_maxsize)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': user_agent, 'Accept-Encoding': 'gzip, deflate'})
+
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0}
+
+        if not verify:
+            requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+
+    @classmethod
+    def default(cls):
+        '''
+        Returns the process-wide client, shared by PageFetcher and main.fetch_summary_data.
+        '''
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def get(self, url, headers=None, timeout=None):
+        '''
+        GET url, retrying requests.RequestException, 429 and 5xx. Returns the last response (check its
+        status_code), or raises the last requests.RequestException if no response was received at all. Any other
+        exception is raised at once.
+        '''
+        for attempt in range(self.retries + 1):
+            response = None
+            error = None
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, headers=headers, verify=self.verify, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                error = e
+            except BaseException:
+                self.limiter.release(adjust=False)
+                raise
+
+            throttled = response is None or response.status_code in RETRY_STATUSES
+            self.limiter.release(throttled=throttled)
+            self._count('requests')
+            if throttled:
+                self._count('throttled')
+
+            if not throttled or attempt == self.retries:
+                break
+
+            self._count('retries')
+            time.sleep(self._backoff(attempt, response))
+
+        if response is None:
+            raise error
+        return response
+
+    def _backoff(self, attempt, response):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # full jitter: uniform between 0 and the exponential backoff, so retrying workers do not stampede together
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
@@ -0,0 +1,100 @@
+"""
+IntensityParser
+
+Turns the intensity lists of PHIVOLCS bulletins into one row per event, source, intensity and town, for the
+public.tbldaily_ph_earthquake_intensity table.
+
+Sample bulletin text (see earthquake_information.txt):
+    ... Reported Intensities : ... Intensity IV - Gigmoto and Virac, CATANDUANES Intensity III - Cabusao, Gainza,
+    and Ragay, CAMARINES SUR; Barcelona and Gubat, SORSOGON ... Instrumental Intensities: Intensity IV - City of
+    Tabaco, ALBAY; Virac, CATANDUANES ... Expecting Damage : ...
+
+    -> ('2024_1001_2119', 4, 'Gigmoto', 'Catanduanes', 'reported'), ('2024_1001_2119', 4, 'Virac', 'Catanduanes',
+       'reported'), ..., ('2024_1001_2119', 4, 'City of Tabaco', 'Albay', 'instrumental'), ...
+
+Provinces are title cased like the province column of modules.LocationParser ('CAMARINES SUR' -> 'Camarines Sur').
+Rows are produced lazily, bulletin by bulletin, so a whole historical backfill can be streamed to the database in
+chunks (see parse()).
+"""
+
+
+import re
+import pandas as pd
+
+
+INTENSITY_SECTION = re.compile(r'Reported Intensities\s*:(.*?)(?:Expecting Damage\s*:|$)', re.S)
+INSTRUMENTAL_SPLIT = re.compile(r'Instrumental\s*Intensit(?:y|ies)\s*:', re.I)
+INTENSITY_ENTRY = re.compile(r'Intensity\s+([IVX]+)\s*[-–:]\s*(.+?)(?=\s*Intensity\s+[IVX]+\s*[-–:]|$)', re.S)
+TOWN_SEPARATOR = re.compile(r'\s*,\s*(?:and\s+)?|\s+and\s+')
+
+ROMAN_NUMERALS = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6, 'VII': 7, 'VIII': 8, 'IX': 9, 'X': 10}
+
+
+class IntensityParser:
+    '''
+    Parses the reported and instrumental intensities of bulletin text.
+
+    Sample usage:
+        for df_chunk in IntensityParser().parse(df['event_id'], df['details']):
+            ...
+    '''
+
+    COLUMNS = ['event_id', 'intensity', 'municipality', 'province', 'source']
+
+    def iter_rows(self, event_ids, details):
+        '''
+        Yields (event_id, intensity, municipality, province, source) tuples for every bulletin text of details.
+        source is 'reported' or 'instrumental'. Bulletins without intensities (or None) yield nothing.
+        '''
+        for event_id, text in zip(event_ids, details):
+            if not isinstance(text, str):
+                continue
+            section = INTENSITY_SECTION.search(text)
+            if section is None:
+                continue
+
+            parts = INSTRUMENTAL_SPLIT.split(section.group(1), maxsplit=1)
+            for source, part in zip(('reported', 'instrumental'), parts):
+                for numeral, places in INTENSITY_ENTRY.findall(part):
+                    intensity = ROMAN_NUMERALS.get(numeral)
+                    if intensity is None:
+                        continue
+                    for municipality, province in self._split_places(places):
+                        yield event_id, intensity, municipality, province, source
+
+    def parse(self, event_ids, details, chunksize=50000):
+        '''
+        Yields DataFrames of at most chunksize rows with the columns of COLUMNS (intensity as int16, source as a
+        categorical). Pass it to DBConnect.DataDumper.copy_import() to stream the rows to the database.
+        '''
+        rows = []
+        for row in self.iter_rows(event_ids, details):
+            rows.append(row)
+            if len(rows) >= chunksize:
+                yield self._to_frame(rows)
+                rows = []
+        if rows:
+            yield self._to_frame(rows)
+
+    @staticmethod
+    def _split_places(places):
+        '''
+        'Cabusao, Gainza, and Ragay, CAMARINES SUR; Barcelona and Gubat, SORSOGON'
+            -> ('Cabusao', 'Camarines Sur'), ('Gainza', 'Camarines Sur'), ..., ('Gubat', 'Sorsogon')
+        '''
+        for group in places.split(';'):
+            towns, _, province = group.strip().rpartition(',')
+            if not towns:
+                # no province given, the whole group is the town list
+                towns, province = province, None
+            province = province.strip().title() if province else None
+            for town in TOWN_SEPARATOR.split(towns.strip()):
+                town = town.strip(' .')
+                if town:
+                    yield town, province
+
+    def _to_frame(self, rows):
+        df = pd.DataFrame(rows, columns=self.COLUMNS)
+        df['intensity'] = df['intensity'].astype('int16')
+        df['source'] = df['source'].astype('category')
+        return df
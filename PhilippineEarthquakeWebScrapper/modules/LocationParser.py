@@ -0,0 +1,92 @@
+"""
+LocationParser
+
+Splits the PHIVOLCS relative location of an event into its parts:
+
+    '023 km N 74° E of Cagwait (Surigao Del Sur)'
+        -> ref_distance_km = 23.0, ref_bearing_deg = 74.0, municipality = 'Cagwait', province = 'Surigao Del Sur'
+
+The bearing is the azimuth of the epicenter seen from the reference town, in degrees clockwise from north
+('N 74° E' -> 74, 'S 10° W' -> 190, 'N 20° W' -> 340, a plain 'S' -> 180). Directions may also be written in full
+('005 km West of ...').
+
+A month holds a few thousand events but only a few hundred distinct locations, and the reference towns recur across
+months, so every distinct string is parsed once (LRU cache) and the results are spread back over the Series.
+"""
+
+
+import re
+import functools
+import numpy as np
+import pandas as pd
+
+
+LOCATION_PATTERN = re.compile(
+    r'^\s*(?P<distance>\d+(?:\.\d+)?)\s*km\s+'
+    r'(?P<from_dir>North|South|East|West|[NSEW])(?:\s*(?P<degrees>\d+(?:\.\d+)?)\s*°?\s*(?P<to_dir>East|West|[EW]))?\s+'
+    r'of\s+(?P<municipality>.+?)\s*\((?P<province>[^()]*)\)\s*$'
+)
+
+# azimuth of the plain directions ('003 km S of ...')
+_CARDINAL_BEARINGS = {'N': 0.0, 'E': 90.0, 'S': 180.0, 'W': 270.0}
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_location(location):
+    '''
+    Parses one location string. Returns (ref_distance_km, ref_bearing_deg, municipality, province), with None for
+    the parts that could not be read.
+    '''
+    match = LOCATION_PATTERN.match(location) if isinstance(location, str) else None
+    if match is None:
+        return None, None, None, None
+
+    from_dir, degrees, to_dir = match.group('from_dir', 'degrees', 'to_dir')
+    from_dir = from_dir[0]  # 'West' -> 'W'
+    to_dir = to_dir[0] if to_dir else None
+    if degrees is None:
+        bearing = _CARDINAL_BEARINGS[from_dir]
+    else:
+        degrees = float(degrees)
+        if from_dir == 'N':
+            bearing = degrees if to_dir == 'E' else (360.0 - degrees) % 360.0
+        else:
+            bearing = 180.0 - degrees if to_dir == 'E' else 180.0 + degrees
+
+    return float(match.group('distance')), bearing, match.group('municipality').strip(), match.group('province').strip()
+
+
+class LocationParser:
+    '''
+    Parses a Series of location strings into typed columns.
+
+    Sample usage:
+        df_places = LocationParser().parse(df['location'])
+        df = df.join(df_places)
+    '''
+
+    COLUMNS = ['ref_distance_km', 'ref_bearing_deg', 'municipality', 'province']
+
+    def parse(self, locations):
+        '''
+        Returns a DataFrame with the same index as locations and the columns:
+            ref_distance_km (float32), ref_bearing_deg (float32), municipality, province (categoricals)
+        Locations that do not follow the PHIVOLCS format are left null.
+        '''
+        # parse every distinct string once, then spread the results back with the factorized codes
+        codes, uniques = pd.factorize(locations)
+        parts = [parse_location(location) for location in uniques]
+
+        df = pd.DataFrame(index=locations.index)
+        for position, column in enumerate(self.COLUMNS):
+            values = np.array([part[position] for part in parts] + [None], dtype=object)[codes]  # code -1 -> None
+            if column in ('municipality', 'province'):
+                df[column] = pd.Categorical(values)
+            else:
+                df[column] = pd.to_numeric(pd.Series(values, index=locations.index), errors='coerce').astype('float32')
+
+        return df
+
+    @staticmethod
+    def cache_info():
+        return parse_location.cache_info()
@@ -1,47 +1,294 @@
 import logging
+import logging.handlers
 import time
+import json
+import queue
+import atexit
+import threading
+import contextlib
+import contextvars
 from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 
 
+class _Span(contextlib.ContextDecorator):
+    '''
+    Times a block of code (or every call of a decorated function) and records it with Logger.record_timing().
+    '''
+    def __init__(self, logger, name):
+        self._logger = logger
+        self.name = name
+        self._start_time = None
+
+    def _recreate_cm(self):
+        # a fresh span per decorated call, so concurrent calls do not share the start time
+        return _Span(self._logger, self.name)
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._logger.record_timing(self.name, time.perf_counter() - self._start_time, failed=exc_type is not None)
+        return False
+
+
+# per-thread / per-task context (e.g. url, event_id) appended to every log line, see Logger.context()
+_log_context = contextvars.ContextVar('log_context', default=())
+
+_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'exception': logging.ERROR,
+}
+
+
+class _LogContext:
+    '''
+    Adds fields to the log context of the current thread for the duration of a with block, see Logger.context().
+    '''
+    def __init__(self, fields):
+        self.fields = tuple(fields.items())
+        self._token = None
+
+    def __enter__(self):
+        self._token = _log_context.set(_log_context.get() + self.fields)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _log_context.reset(self._token)
+        return False
+
+
+class _ContextFilter(logging.Filter):
+    '''
+    Adds the current Logger.context() fields to the record as record.context, e.g. " [url=... event_id=...]".
+    '''
+    def filter(self, record):
+        fields = _log_context.get()
+        record.context = ' [' + ' '.join(f'{key}={value}' for key, value in fields) + ']' if fields else ''
+        return True
+
+
+class _RecordTypeFilter(logging.Filter):
+    '''
+    Lets through only the metrics records (metrics=True) or only the regular log records (metrics=False).
+    '''
+    def __init__(self, metrics):
+        super().__init__()
+        self.metrics = metrics
+
+    def filter(self, record):
+        return record.name.endswith('.metrics') == self.metrics
+
+
 class Logger:
+    '''
+    Process-wide logger. Logger() always returns the same instance, so creating it again (e.g. in every stage or
+    worker thread) does not add duplicate handlers.
+
+    The calling thread only puts the record on a queue (QueueHandler); a QueueListener thread writes it to the log
+    file, the console and the metrics file, so fetch workers never wait on disk I/O.
+    '''
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
     def __init__(self, log_file='logs/scraper_log.txt'):
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self._initialized = True
+
         # Configure logger
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)  # Set the overall logging level
+        self.logger.propagate = False
+        self.metrics_logger = logging.getLogger(f'{__name__}.metrics')
+        self.metrics_logger.setLevel(logging.INFO)
+        self.metrics_logger.propagate = False
 
         # Create log file with dynamic name based on date and time
         current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file_name = f'{log_file}_{current_time}.txt'
 
         # Create handlers
-        file_handler = logging.FileHandler(log_file_name)
+        file_handler = logging.FileHandler(log_file_name, delay=True)
         console_handler = logging.StreamHandler()
 
+        # Metrics (timing spans and counters), written as json lines next to the log file
+        self.metrics_file_name = f'{log_file}_{current_time}_metrics.jsonl'
+        metrics_handler = logging.FileHandler(self.metrics_file_name, encoding='utf-8', delay=True)
+
         # Set log level for handlers
         file_handler.setLevel(logging.DEBUG)
         console_handler.setLevel(logging.INFO)
 
         # Create formatters and add them to the handlers
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s%(context)s')
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
+        metrics_handler.setFormatter(logging.Formatter('%(message)s'))
+
+        file_handler.addFilter(_RecordTypeFilter(metrics=False))
+        console_handler.addFilter(_RecordTypeFilter(metrics=False))
+        metrics_handler.addFilter(_RecordTypeFilter(metrics=True))
+
+        # The loggers only enqueue, the listener thread does the writing
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(_ContextFilter())
+        self.logger.handlers = [queue_handler]
+        self.metrics_logger.handlers = [queue_handler]
+
+        self._listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, metrics_handler, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.close)
+
+        self._metrics_lock = threading.Lock()
+        self._counters = {}  # name -> {label: value}, label is None for plain counters
+        self._timings = {}   # name -> {'count', 'failed', 'total_seconds', 'max_seconds'}
+        self._metrics_server = None
+
+    def log_message(self, message, level='info', *args):
+        """
+        Logs messages to the log file with specified logging level.
+
+        Pass the values as %-style args to skip the formatting when the level is disabled:
+            logger.log_message("Failed to retrieve the page %s. %s", 'warning', url, error)
+        """
+        log_level = _LEVELS.get(level, logging.INFO)  # Default to info
+        if not self.logger.isEnabledFor(log_level):
+            return
+        self.logger.log(log_level, message, *args, exc_info=level == 'exception')
+
+    def is_enabled(self, level):
+        """True if messages of this level are written, to guard building expensive debug payloads."""
+        return self.logger.isEnabledFor(_LEVELS.get(level, logging.INFO))
+
+    def context(self, **fields):
+        """
+        Appends fields (e.g. url, event_id) to every message logged inside the block by the current thread:
+
+            with logger.context(event_id=event_id):
+                ...
+        """
+        return _LogContext(fields)
+
+    def close(self):
+        """Flushes the queued records and stops the listener thread (also called at exit)."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    ##########################################
+    ## Metrics
+    ##########################################
+
+    def span(self, name):
+        """
+        Times a stage. Use as a context manager or as a decorator:
+
+            with logger.span('scrape_detail_data'):
+                ...
+
+            @logger.span('parse')
+            def parse(...):
+                ...
+        """
+        return _Span(self, name)
+
+    def record_timing(self, name, seconds, failed=False):
+        """Records the duration of one run of a stage and emits it as a json line."""
+        with self._metrics_lock:
+            timing = self._timings.setdefault(name, {'count': 0, 'failed': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            timing['count'] += 1
+            timing['failed'] += int(failed)
+            timing['total_seconds'] += seconds
+            timing['max_seconds'] = max(timing['max_seconds'], seconds)
+        self._emit({'type': 'span', 'name': name, 'seconds': round(seconds, 6), 'failed': failed})
+
+    def increment(self, name, value=1, label=None):
+        """
+        Adds value to a counter, e.g. logger.increment('bytes_downloaded', len(content)).
+        Use label to keep a histogram, e.g. logger.increment('http_status', label=response.status_code).
+        """
+        label = None if label is None else str(label)
+        with self._metrics_lock:
+            counter = self._counters.setdefault(name, {})
+            counter[label] = counter.get(label, 0) + value
+
+    def get_metrics(self):
+        """Returns a snapshot of the counters and timings."""
+        with self._metrics_lock:
+            counters = {
+                name: values[None] if list(values) == [None] else dict(values)
+                for name, values in self._counters.items()
+            }
+            timings = {name: dict(timing) for name, timing in self._timings.items()}
+        return {'counters': counters, 'timings': timings}
+
+    def summarize(self):
+        """Logs a summary of the run (time per stage and counters) and emits it as a json line."""
+        metrics = self.get_metrics()
+        for name, timing in metrics['timings'].items():
+            self.log_message("[metrics] %s: %.3fs over %d run(s), max %.3fs, %d failed", 'info',
+                             name, timing['total_seconds'], timing['count'], timing['max_seconds'], timing['failed'])
+        for name, value in metrics['counters'].items():
+            self.log_message("[metrics] %s: %s", 'info', name, value)
+        self._emit({'type': 'summary', **metrics})
+        return metrics
+
+    def prometheus_text(self, prefix='phileq'):
+        """Returns the metrics in the Prometheus text exposition format."""
+        metrics = self.get_metrics()
+        with self._metrics_lock:
+            counters = {name: dict(values) for name, values in self._counters.items()}
+        lines = []
+        for name, values in counters.items():
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            for label, value in values.items():
+                label_text = '' if label is None else f'{{label="{label}"}}'
+                lines.append(f'{prefix}_{name}_total{label_text} {value}')
+        if metrics['timings']:
+            lines.append(f'# TYPE {prefix}_stage_seconds summary')
+            for name, timing in metrics['timings'].items():
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {timing["total_seconds"]}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {timing["count"]}')
+            lines.append(f'# TYPE {prefix}_stage_failures_total counter')
+            for name, timing in metrics['timings'].items():
+                lines.append(f'{prefix}_stage_failures_total{{stage="{name}"}} {timing["failed"]}')
+        return '\n'.join(lines) + '\n'
+
+    def start_metrics_server(self, port=9108):
+        """Serves prometheus_text() on http://0.0.0.0:<port>/metrics from a background thread (for long-running services)."""
+        logger = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = logger.prometheus_text().encode('utf-8')
+                self.send_response(200 if self.path.startswith('/metrics') else 404)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._metrics_server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+        threading.Thread(target=self._metrics_server.serve_forever, daemon=True).start()
+        self.log_message("Serving metrics on port %s", 'info', port)
 
-        # Add the handlers to the logger
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-
-    def log_message(self, message, level='info'):
-        """Logs messages to the log file with specified logging level."""
-        if level == 'info':
-            self.logger.info(message)
-        elif level == 'error':
-            self.logger.error(message)
-        elif level == 'exception':
-            self.logger.exception(message)
-        elif level == 'warning':
-            self.logger.warning(message)
-        elif level == 'debug':
-            self.logger.debug(message)
-        else:
-            self.logger.info(message)  # Default to info
+    def _emit(self, record):
+        record = {'ts': datetime.now().isoformat(timespec='milliseconds'), **record}
+        self.metrics_logger.info(json.dumps(record, default=str))
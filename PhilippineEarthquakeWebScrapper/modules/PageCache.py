@@ -0,0 +1,148 @@
+"""
+PageCache
+
+Persistent on-disk cache of fetched pages, keyed by url.
+
+Each entry keeps the raw page content together with the ETag / Last-Modified validators returned by the server and
+the time it was fetched. Entries younger than 'fresh_for' seconds are served without touching the network; older
+entries are revalidated with If-None-Match / If-Modified-Since so an unchanged page costs a 304 instead of a full
+download. The cache is trimmed by age ('max_age') and total size ('max_size_bytes'), oldest first.
+
+Layout of the cache folder:
+    <cache_dir>/index.json         -> url -> {file, etag, last_modified, fetched_at, size}
+    <cache_dir>/<sha1 of url>.html -> raw page content
+"""
+
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+
+class PageCache:
+    '''
+    Url -> raw page content cache stored in a local folder.
+
+    Sample usage:
+        cache = PageCache('page_cache', fresh_for=24 * 3600)
+        fetcher = PageFetcher(max_workers=8, cache=cache)
+    '''
+    def __init__(self, cache_dir='page_cache', fresh_for=24 * 3600, max_age=90 * 24 * 3600, max_size_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.max_size_bytes = max_size_bytes
+        self._index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self._index_path, encoding='utf-8') as index_file:
+                self._index = json.load(index_file)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _file_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html')
+
+    def get(self, url):
+        '''
+        Returns the cached content of url, or None if it is not cached.
+        '''
+        with self._lock:
+            entry = self._index.get(url)
+        if entry is None:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, entry['file']), 'rb') as page_file:
+                return page_file.read()
+        except OSError:
+            with self._lock:
+                self._index.pop(url, None)
+            return None
+
+    def is_fresh(self, url):
+        '''
+        True if url was fetched (or revalidated) less than 'fresh_for' seconds ago.
+        '''
+        with self._lock:
+            entry = self._index.get(url)
+        return entry is not None and time.time() - entry['fetched_at'] < self.fresh_for
+
+    def conditional_headers(self, url):
+        '''
+        Returns the If-None-Match / If-Modified-Since headers to revalidate url, if any validators are known.
+        '''
+        with self._lock:
+            entry = self._index.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, content, etag=None, last_modified=None):
+        '''
+        Stores content for url along with its validators.
+        '''
+        file_path = self._file_path(url)
+        tmp_path = f'{file_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as page_file:
+            page_file.write(content)
+        os.replace(tmp_path, file_path)
+
+        with self._lock:
+            self._index[url] = {
+                'file': os.path.basename(file_path),
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': time.time(),
+                'size': len(content)
+            }
+
+    def touch(self, url):
+        '''
+        Marks url as freshly revalidated (e.g. after a 304 Not Modified response).
+        '''
+        with self._lock:
+            if url in self._index:
+                self._index[url]['fetched_at'] = time.time()
+
+    def evict(self):
+        '''
+        Removes entries older than 'max_age', then the oldest entries until the cache fits in 'max_size_bytes'.
+        Returns the number of evicted entries.
+        '''
+        now = time.time()
+        with self._lock:
+            entries = sorted(self._index.items(), key=lambda item: item[1]['fetched_at'])
+            total_size = sum(entry['size'] for _, entry in entries)
+            evicted = []
+            for url, entry in entries:
+                if now - entry['fetched_at'] > self.max_age or total_size > self.max_size_bytes:
+                    evicted.append(url)
+                    total_size -= entry['size']
+            for url in evicted:
+                entry = self._index.pop(url)
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry['file']))
+                except OSError:
+                    pass
+        return len(evicted)
+
+    def save(self):
+        '''
+        Writes the index to disk. Call after a batch of fetches.
+        '''
+        with self._lock:
+            tmp_path = f'{self._index_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as index_file:
+                json.dump(self._index, index_file)
+            os.replace(tmp_path, self._index_path)
+
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,117 @@
+"""
+PageFetcher
+
+Concurrent page fetching for the PHIVOLCS bulletin pages.
+
+Pages are fetched on a bounded thread pool and handed back in the same order as the input links, so the results
+can be assigned straight to a DataFrame column. A failed page never aborts the batch: it is returned as a
+FetchResult carrying the error instead of the content.
+
+If a PageCache is passed, fresh pages are served from disk and stale ones are revalidated with a conditional GET.
+
+Requests go through a modules.HttpClient (keep-alive, timeouts, retries, adaptive concurrency limit), by default the
+process-wide one, so max_workers is an upper bound and the client settles on what the site tolerates.
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from .HttpClient import HttpClient
+
+
+class FetchResult:
+    '''
+    Outcome of fetching a single page.
+    '''
+    def __init__(self, url, content=None, status_code=None, error=None, from_cache=False):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.error = error
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        '''
+        True if the page was retrieved successfully.
+        '''
+        return self.error is None and self.content is not None
+
+    def __repr__(self):
+        return f"FetchResult(url={self.url!r}, status_code={self.status_code}, error={self.error!r}, from_cache={self.from_cache})"
+
+
+class PageFetcher:
+    '''
+    Fetches a list of pages concurrently with a bounded number of workers.
+
+    Sample usage:
+        fetcher = PageFetcher(max_workers=8)
+        results = fetcher.fetch_all(df['hlink'])
+        df['details'] = [parse(r.content) if r.ok else None for r in results]
+    '''
+    def __init__(self, max_workers=8, timeout=None, cache=None, client=None):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.max_workers = max_workers
+        self.timeout = timeout  # None: the timeout of the client
+        self.cache = cache
+        self.client = client if client is not None else HttpClient.default()
+
+    def fetch(self, url):
+        '''
+        Fetches a single page. Never raises; errors are returned in the FetchResult.
+        '''
+        if self.cache is None:
+            return self._get(url)
+
+        if self.cache.is_fresh(url):
+            content = self.cache.get(url)
+            if content is not None:
+                return FetchResult(url, content=content, status_code=200, from_cache=True)
+
+        result = self._get(url, headers=self.cache.conditional_headers(url))
+        if result.status_code == 304:
+            content = self.cache.get(url)
+            if content is None:
+                # cached copy is gone, fetch the page again without validators
+                return self._get(url)
+            self.cache.touch(url)
+            return FetchResult(url, content=content, status_code=304, from_cache=True)
+
+        return result
+
+    def _get(self, url, headers=None):
+        try:
+            response = self.client.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return FetchResult(url, error=str(e))
+
+        if response.status_code == 304:
+            return FetchResult(url, status_code=304)
+
+        if response.status_code != 200:
+            return FetchResult(url, status_code=response.status_code, error=f"Status code: {response.status_code}")
+
+        if self.cache is not None:
+            self.cache.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        return FetchResult(url, content=response.content, status_code=response.status_code)
+
+    def fetch_all(self, urls):
+        '''
+        Fetches all urls concurrently and returns a list of FetchResult in the same order as urls.
+        '''
+        urls = list(urls)
+        if not urls:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            results = list(executor.map(self.fetch, urls))
+
+        if self.cache is not None:
+            self.cache.evict()
+            self.cache.save()
+
+        return results
@@ -0,0 +1,131 @@
+"""
+SpatialIndex
+
+In-memory spatial index over the latitude/longitude columns of an event DataFrame, for the radius, bounding box and
+nearest-neighbour lookups of the dashboards and alerting without scanning every row.
+
+The points are bucketed in a regular grid of 'cell_deg' degrees. A query only looks at the cells overlapping its
+search area and then filters those candidates with the exact great-circle (haversine) distance, so results are exact.
+Distances are in km. The grid does not wrap around the antimeridian, which is fine for the Philippine catalogue.
+
+The database counterpart (PostGIS, GiST indexed) is DBConnect.DatabaseExtractor.get_events_within_radius(),
+get_events_in_bbox() and get_nearest_events().
+"""
+
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat, lon, lats, lons):
+    '''
+    Great-circle distance in km from (lat, lon) to every point of lats/lons.
+    '''
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(np.asarray(lats, dtype='float64')), np.radians(np.asarray(lons, dtype='float64'))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpatialIndex:
+    '''
+    Grid index over the points of a DataFrame. Queries return the matching rows of the DataFrame.
+
+    Sample usage:
+        index = SpatialIndex(df_events)
+        df_near = index.within_radius(9.31, 126.32, radius_km=50)          # adds a 'distance_km' column
+        df_box = index.in_bbox(min_lat=4.5, min_lon=116.0, max_lat=10.0, max_lon=127.0)
+        df_closest = index.nearest(14.60, 120.98, k=5)
+    '''
+    def __init__(self, df_data, lat_column='latitude', lon_column='longitude', cell_deg=0.5):
+        self.df_data = df_data
+        self.cell_deg = cell_deg
+
+        valid = df_data[lat_column].notna().to_numpy() & df_data[lon_column].notna().to_numpy()
+        self._positions = np.flatnonzero(valid)
+        self._lats = df_data[lat_column].to_numpy(dtype='float64')[valid]
+        self._lons = df_data[lon_column].to_numpy(dtype='float64')[valid]
+
+        # sort the points by cell, so every cell is one contiguous slice
+        rows = np.floor(self._lats / cell_deg).astype('int64')
+        cols = np.floor(self._lons / cell_deg).astype('int64')
+        order = np.lexsort((cols, rows))
+        self._positions, self._lats, self._lons = self._positions[order], self._lats[order], self._lons[order]
+
+        cell_keys, starts, counts = np.unique(np.stack([rows[order], cols[order]], axis=1), axis=0, return_index=True, return_counts=True)
+        self._cells = {(int(row), int(col)): slice(start, start + count) for (row, col), start, count in zip(cell_keys, starts, counts)}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        '''
+        Returns the indexes (into the sorted point arrays) of the points in the cells overlapping the box.
+        '''
+        row_range = range(int(np.floor(min_lat / self.cell_deg)), int(np.floor(max_lat / self.cell_deg)) + 1)
+        col_range = range(int(np.floor(min_lon / self.cell_deg)), int(np.floor(max_lon / self.cell_deg)) + 1)
+
+        if len(row_range) * len(col_range) > len(self._cells):
+            # the box covers more cells than there are points in use, walk the occupied cells instead
+            slices = [
+                cell_slice for (row, col), cell_slice in self._cells.items()
+                if row in row_range and col in col_range
+            ]
+        else:
+            slices = [self._cells[(row, col)] for row in row_range for col in col_range if (row, col) in self._cells]
+
+        if not slices:
+            return np.empty(0, dtype='int64')
+        return np.concatenate([np.arange(cell_slice.start, cell_slice.stop) for cell_slice in slices])
+
+    def _rows(self, candidates, distances=None):
+        df_result = self.df_data.iloc[self._positions[candidates]].copy()
+        if distances is not None:
+            df_result['distance_km'] = distances
+            df_result = df_result.sort_values('distance_km', kind='stable')
+        return df_result
+
+    def _within_radius(self, lat, lon, radius_km):
+        lat_span = radius_km / KM_PER_DEGREE
+        # longitude degrees shrink with the latitude, take the widest span over the search area
+        widest_cos = np.cos(np.radians(min(abs(lat) + lat_span, 90.0)))
+        lon_span = 360.0 if widest_cos < 1e-6 else min(radius_km / (KM_PER_DEGREE * widest_cos), 360.0)
+
+        candidates = self._candidates(lat - lat_span, lon - lon_span, lat + lat_span, lon + lon_span)
+        distances = haversine_km(lat, lon, self._lats[candidates], self._lons[candidates])
+        in_radius = distances <= radius_km
+        return candidates[in_radius], distances[in_radius]
+
+    def within_radius(self, lat, lon, radius_km):
+        '''
+        Returns the rows within radius_km of (lat, lon), closest first, with their 'distance_km'.
+        '''
+        candidates, distances = self._within_radius(lat, lon, radius_km)
+        return self._rows(candidates, distances)
+
+    def in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        '''
+        Returns the rows inside the bounding box (edges included), in DataFrame order.
+        '''
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats, lons = self._lats[candidates], self._lons[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        candidates = candidates[inside]
+        return self._rows(candidates[np.argsort(self._positions[candidates], kind='stable')])
+
+    def nearest(self, lat, lon, k=1):
+        '''
+        Returns the k rows closest to (lat, lon), closest first, with their 'distance_km'.
+        '''
+        k = min(k, len(self))
+        radius_km = self.cell_deg * KM_PER_DEGREE
+        while True:
+            candidates, distances = self._within_radius(lat, lon, radius_km)
+            # every point within radius_km is found, so once there are k of them the k nearest are among them
+            if len(candidates) >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+                closest = np.argsort(distances, kind='stable')[:k]
+                return self._rows(candidates[closest], distances[closest])
+            radius_km *= 2
@@ -1,2 +1,12 @@
 from . Logger import *
-from . DBConnect import *
\ No newline at end of file
+from . DBConnect import *
+from . PageFetcher import *
+from . PageCache import *
+from . BulletinParser import *
+from . SpatialIndex import *
+from . LocationParser import *
+from . EventCatalog import *
+from . IntensityParser import *
+from . HttpClient import *
+from . HtmlExtractor import *
+from . BulletinArchive import *
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Continuous polling of the PHIVOLCS landing page.
+
+Instead of reloading the whole month like main.py, the summary table is polled on an interval and every row is
+fingerprinted. Only the events that are new or whose row changed (e.g. a revised bulletin) get their bulletin
+fetched and are upserted to the database. The summary page itself is revalidated with a conditional GET, so an
+unchanged page costs a 304 and no parsing at all.
+
+The poll interval starts at --min-interval, doubles every time nothing changed (up to --max-interval) and drops
+back to --min-interval as soon as something new shows up. For every loaded batch the latency from the first time
+an event was seen to the moment it was committed is logged.
+
+The fingerprints are kept in a state file, so a restart does not reload events that were already loaded.
+With --metrics-port the Logger metrics are served in the Prometheus text format.
+
+Usage (from the PhilippineEarthquakeWebScrapper folder):
+    python monitor.py [--min-interval 15] [--max-interval 300] [--state monitor_state.json] [--metrics-port 9108]
+"""
+
+
+import os
+import json
+import time
+import argparse
+import warnings
+
+import pandas as pd
+
+from modules.Logger import Logger
+from modules.DBConnect import DBConnect
+from modules.PageFetcher import PageFetcher
+from modules.PageCache import PageCache
+from modules.BulletinArchive import BulletinArchive
+from main import parse_summary_table, clean_summary_data, scrape_detail_data, parse_detail_data, dump_to_database, ARCHIVE_DIR
+
+
+# summary columns that make up the fingerprint of an event row
+FINGERPRINT_COLUMNS = ['origin_time', 'latitude', 'longitude', 'depth_km', 'magnitude', 'location', 'hlink']
+
+
+def load_state(state_path):
+    try:
+        with open(state_path, encoding='utf-8') as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {'fingerprints': {}}
+
+
+def save_state(state_path, state):
+    tmp_path = f'{state_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as state_file:
+        json.dump(state, state_file)
+    os.replace(tmp_path, state_path)
+
+
+def fingerprint_rows(df_data):
+    """
+    Returns a Series (indexed like df_data) of row fingerprints built from FINGERPRINT_COLUMNS.
+    """
+    return pd.util.hash_pandas_object(df_data[FINGERPRINT_COLUMNS], index=False).astype(str)
+
+
+def find_changed_events(df_data, fingerprints):
+    """
+    Returns the rows of df_data that are new or changed since the fingerprints were taken, and their fingerprints.
+    """
+    current = fingerprint_rows(df_data)
+    changed = [fingerprints.get(event_id) != fingerprint for event_id, fingerprint in zip(df_data['event_id'], current)]
+    return df_data[changed].copy(), current[changed]
+
+
+def poll_once(summary_fetcher, url, state, first_seen, logger, max_workers=8, archive=None, trust_not_modified=True):
+    """
+    Polls the summary page once and loads the new or changed events.
+
+    Parameters:
+        summary_fetcher: PageFetcher with a PageCache, used to revalidate the summary page.
+        url: The url of the summary page.
+        state: The monitor state ({'fingerprints': {event_id: fingerprint}}), updated in place once events are loaded.
+        first_seen: Dict of event_id -> time the event change was first seen, for the latency metric. Events stay
+                    in it until they are loaded, so it also holds the events left over from failed bulletin fetches.
+        logger: The logger instance to log messages.
+        max_workers: Maximum number of bulletin pages fetched at the same time.
+        archive: Optional BulletinArchive, keeps the raw bulletins.
+        trust_not_modified: Skip the poll when the summary page answers 304. Pass False for the first poll after a
+                            start, the page cache may be ahead of the state file.
+
+    Returns:
+        int: The number of events loaded (0 if nothing changed).
+    """
+    result = summary_fetcher.fetch_all([url])[0]
+    if not result.ok:
+        raise RuntimeError(f"failed to fetch {url}. {result.error}")
+
+    # page not modified since the last poll, and no event left over from a failed load
+    if result.status_code == 304 and trust_not_modified and not first_seen:
+        return 0
+
+    cleaned = clean_summary_data(parse_summary_table(result.content, result.url), logger)
+    if cleaned is None:
+        raise RuntimeError(f"failed to clean the summary table of {url}")
+    _, _, df_summary = cleaned
+
+    df_changed, changed_fingerprints = find_changed_events(df_summary, state['fingerprints'])
+    if df_changed.empty:
+        return 0
+
+    seen_time = time.time()
+    for event_id in df_changed['event_id']:
+        first_seen.setdefault(event_id, seen_time)
+
+    logger.log_message(f"{len(df_changed)} new or changed events", level='info')
+
+    df_changed = scrape_detail_data(df_changed, logger, max_workers=max_workers, archive=archive)
+
+    # events whose bulletin could not be fetched are not loaded (their row would overwrite the bulletin fields
+    # already in the database with nulls); they keep their old fingerprint and stay in first_seen, so the next
+    # poll parses the page again, even on a 304, and retries them
+    fetched = df_changed['details'].notna().to_numpy()
+    if not fetched.all():
+        logger.log_message(f"{(~fetched).sum()} bulletins could not be fetched, retrying them on the next poll", level='warning')
+    df_loaded = df_changed[fetched]
+    if df_loaded.empty:
+        return 0
+    loaded_fingerprints = dict(zip(df_loaded['event_id'], changed_fingerprints[fetched]))
+
+    df_loaded = parse_detail_data(df_loaded, logger)
+    if not dump_to_database(df_loaded, logger):
+        raise RuntimeError('failed to load to the database')
+
+    committed_time = time.time()
+    latencies = [committed_time - first_seen.pop(event_id) for event_id in df_loaded['event_id']]
+    for latency in latencies:
+        logger.record_timing('first_seen_to_committed', latency)
+    logger.increment('events_loaded', len(df_loaded))
+    logger.log_message(
+        f"Loaded {len(df_loaded)} events, first-seen to committed latency: "
+        f"avg {sum(latencies) / len(latencies):.2f}s, max {max(latencies):.2f}s",
+        level='info'
+    )
+
+    state['fingerprints'].update(loaded_fingerprints)
+    return len(df_loaded)
+
+
+def run(url, logger, state_path='monitor_state.json', min_interval=15, max_interval=300, max_workers=8):
+    """
+    Polls url forever, see the module docstring.
+    """
+    state = load_state(state_path)
+    first_seen = {}
+    summary_fetcher = PageFetcher(max_workers=1, cache=PageCache('page_cache/summary', fresh_for=0))
+    archive = BulletinArchive(ARCHIVE_DIR)
+    interval = min_interval
+    polled = False
+
+    while True:
+        try:
+            with logger.span('poll'):
+                loaded_count = poll_once(summary_fetcher, url, state, first_seen, logger, max_workers=max_workers,
+                                         archive=archive, trust_not_modified=polled)
+            polled = True
+            if loaded_count:
+                save_state(state_path, state)
+                interval = min_interval
+            else:
+                interval = min(interval * 2, max_interval)
+
+        except Exception as e:
+            logger.log_message(f"Poll failed: {e}", level='error')
+            interval = min(interval * 2, max_interval)
+
+        logger.log_message(f"Next poll in {interval}s", level='debug')
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+
+    # Suppress all warnings
+    warnings.filterwarnings("ignore")
+
+    parser = argparse.ArgumentParser(description='Poll the PHIVOLCS landing page and load new events as they appear')
+    parser.add_argument('--url', default='https://earthquake.phivolcs.dost.gov.ph/')
+    parser.add_argument('--min-interval', type=float, default=15, help='seconds between polls when events keep coming')
+    parser.add_argument('--max-interval', type=float, default=300, help='longest wait between polls when nothing changes')
+    parser.add_argument('--workers', type=int, default=8, help='bulletin pages fetched at the same time')
+    parser.add_argument('--state', default='monitor_state.json')
+    parser.add_argument('--metrics-port', type=int, default=None, help='serve Prometheus metrics on this port')
+    args = parser.parse_args()
+
+    logger = Logger()  # Initialize the logger instance
+    if args.metrics_port:
+        logger.start_metrics_server(args.metrics_port)
+
+    try:
+        run(args.url, logger, state_path=args.state, min_interval=args.min_interval, max_interval=args.max_interval, max_workers=args.workers)
+    except KeyboardInterrupt:
+        logger.log_message("Monitor stopped", level='info')
+        logger.summarize()
+    finally:
+        DBConnect.dispose_engines()
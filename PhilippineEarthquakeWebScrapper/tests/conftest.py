@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts and the modules package are imported from the PhilippineEarthquakeWebScrapper folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+import os
+import glob
+
+import pytest
+
+from modules.BulletinArchive import BulletinArchive, page_hash
+
+
+PAGE = b'<html><body>EARTHQUAKE INFORMATION NO. : 1 Date/Time : 02 Oct 2024 - 05:19:50 AM</body></html>'
+REVISED_PAGE = PAGE.replace(b'NO. : 1', b'NO. : 2')
+
+
+def blob_files(root):
+    return glob.glob(os.path.join(root, 'objects', '*', '*'))
+
+
+def test_add_and_get_by_event_id_and_hlink(tmp_path):
+    archive = BulletinArchive(str(tmp_path), compression='gzip')
+
+    content_hash = archive.add('2024_1002_0519', 'https://example.test/2024_1002_0519.html', PAGE)
+
+    assert content_hash == page_hash(PAGE)
+    assert archive.get('2024_1002_0519') == PAGE
+    assert archive.get(hlink='https://example.test/2024_1002_0519.html') == PAGE
+    assert archive.hash_of(hlink='https://example.test/2024_1002_0519.html') == content_hash
+    assert archive.get('unknown') is None
+    assert archive.get_blob('0' * 64) is None
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    archive = BulletinArchive(str(tmp_path), compression='gzip')
+
+    archive.add('a', 'https://example.test/a.html', PAGE)
+    archive.add('b', 'https://example.test/b.html', PAGE)
+
+    assert len(archive) == 2
+    assert len(blob_files(tmp_path)) == 1
+
+
+def test_revised_page_replaces_the_index_entry(tmp_path):
+    archive = BulletinArchive(str(tmp_path), compression='gzip')
+
+    archive.add('a', 'https://example.test/a.html', PAGE)
+    archive.add('a', 'https://example.test/a.html', REVISED_PAGE)
+
+    assert archive.get('a') == REVISED_PAGE
+    assert archive.get_blob(page_hash(PAGE)) == PAGE  # older revisions stay readable
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_index_is_reloaded_after_save(tmp_path):
+    archive = BulletinArchive(str(tmp_path), compression='gzip')
+    archive.add('a', 'https://example.test/a.html', PAGE)
+    archive.add('b', 'https://example.test/b.html', REVISED_PAGE)
+    archive.save()
+
+    reopened = BulletinArchive(str(tmp_path), compression='gzip')
+
+    assert len(reopened) == 2
+    assert reopened.get(hlink='https://example.test/b.html') == REVISED_PAGE
+
+
+def test_iter_pages(tmp_path):
+    archive = BulletinArchive(str(tmp_path), compression='gzip')
+    archive.add('a', 'https://example.test/a.html', PAGE)
+    archive.add('b', 'https://example.test/b.html', REVISED_PAGE)
+
+    pages = list(archive.iter_pages())
+    selected = list(archive.iter_pages(['b', 'unknown']))
+
+    assert [(event_id, content) for event_id, _, _, content in pages] == [('a', PAGE), ('b', REVISED_PAGE)]
+    assert selected == [('b', 'https://example.test/b.html', page_hash(REVISED_PAGE), REVISED_PAGE)]
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        BulletinArchive(str(tmp_path), compression='lz4')
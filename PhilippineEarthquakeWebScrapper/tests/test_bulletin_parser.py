@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+
+from modules.BulletinParser import BulletinParser
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_bulletin():
+    with open(os.path.join(HERE, '..', 'earthquake_information.txt'), encoding='utf-8') as bulletin_file:
+        return bulletin_file.read()
+
+
+def test_recorded_bulletin():
+    df = BulletinParser().parse(pd.Series([read_bulletin()]))
+
+    row = df.iloc[0]
+    assert list(df.columns) == BulletinParser.COLUMNS
+    assert row['info_no'] == 4
+    assert row['event_datetime'] == pd.Timestamp('2024-10-02 05:19:50')
+    assert row['depth_of_focus_km'] == 35
+    assert row['origin'] == 'TECTONIC'
+    assert row['magnitude_type'] == 'Mw'
+    assert row['expecting_damage'] == 'NO'
+    assert row['expecting_aftershocks'] == 'YES'
+    assert row['issued_on'] == pd.Timestamp('2024-10-03 23:00')
+
+
+def test_bulletin_times_are_naive_local_time():
+    df = BulletinParser().parse(pd.Series([read_bulletin()]))
+
+    assert df['event_datetime'].dt.tz is None
+    assert df['issued_on'].dt.tz is None
+
+
+def test_month_name_variants():
+    details = pd.Series([
+        'Date/Time : 05 Sept 2024 - 01:02:03 PM Issued On : 05 Sept 2024 - 02:00 PM',
+        'Date/Time : 05 September 2024 - 01:02:03 PM Issued On : 05 Sep 2024 - 02:00 PM',
+    ])
+
+    df = BulletinParser().parse(details)
+
+    assert df['event_datetime'].tolist() == [pd.Timestamp('2024-09-05 13:02:03')] * 2
+    assert df['issued_on'].tolist() == [pd.Timestamp('2024-09-05 14:00')] * 2
+
+
+def test_missing_fields_are_null():
+    details = pd.Series(['Magnitude : ML 2.3 Reported Intensities : none', None], index=[10, 11])
+
+    df = BulletinParser().parse(details)
+
+    assert df.index.tolist() == [10, 11]
+    assert df.loc[10, 'magnitude_type'] == 'ML'
+    assert df.loc[10, 'origin'] is None
+    assert pd.isna(df.loc[10, 'info_no'])
+    assert pd.isna(df.loc[11, 'event_datetime'])
+    assert df['info_no'].dtype == 'Int64'
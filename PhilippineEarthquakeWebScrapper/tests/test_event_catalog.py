@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from modules.EventCatalog import EventCatalog
+
+
+def make_events(event_ids, provinces, municipalities, day='2024-10-01'):
+    count = len(event_ids)
+    return pd.DataFrame({
+        'event_id': event_ids,
+        'origin_time': pd.date_range(f'{day} 00:00', periods=count, freq='min', tz='Asia/Manila'),
+        'magnitude': pd.Series([2.5] * count, dtype='float32'),
+        'municipality': pd.Categorical(municipalities),
+        'province': pd.Categorical(provinces),
+        'details': ['bulletin text'] * count
+    })
+
+
+def test_write_then_read_round_trip(tmp_path):
+    catalog = EventCatalog(str(tmp_path))
+    df = make_events(['a', 'b'], ['Albay', 'Samar'], ['Tabaco', 'Gandara'])
+
+    assert catalog.write(df) == 2
+    df_read = catalog.read()
+
+    assert df_read['event_id'].tolist() == ['a', 'b']
+    assert 'details' not in df_read.columns
+    assert df_read['province'].tolist() == ['Albay', 'Samar']
+
+
+def test_second_write_keeps_stored_categories(tmp_path):
+    catalog = EventCatalog(str(tmp_path))
+    catalog.write(make_events(['a', 'b'], ['Albay', 'Samar'], ['Tabaco', 'Gandara']))
+    catalog.write(make_events(['c'], ['Quezon'], ['General Nakar'], day='2024-10-02'))
+
+    df_read = catalog.read()
+    assert df_read['event_id'].tolist() == ['a', 'b', 'c']
+    assert df_read['province'].tolist() == ['Albay', 'Samar', 'Quezon']
+    assert df_read['municipality'].tolist() == ['Tabaco', 'Gandara', 'General Nakar']
+
+
+def test_rewrite_replaces_event_by_id(tmp_path):
+    catalog = EventCatalog(str(tmp_path))
+    catalog.write(make_events(['a', 'b'], ['Albay', 'Samar'], ['Tabaco', 'Gandara']))
+    df_revised = make_events(['b'], ['Sorsogon'], ['Bulusan'])
+    df_revised['magnitude'] = pd.Series([4.0], dtype='float32')
+
+    assert catalog.write(df_revised) == 2
+    df_read = catalog.read()
+    assert df_read['event_id'].tolist() == ['a', 'b']
+    assert df_read.set_index('event_id').loc['b', 'province'] == 'Sorsogon'
+    assert df_read.set_index('event_id').loc['b', 'magnitude'] == pytest.approx(4.0)
+
+
+def test_read_filters_time_and_magnitude(tmp_path):
+    catalog = EventCatalog(str(tmp_path))
+    df = make_events(['a', 'b', 'c'], ['Albay'] * 3, ['Tabaco'] * 3)
+    df['magnitude'] = pd.Series([2.0, 5.0, 6.0], dtype='float32')
+    catalog.write(df)
+
+    df_read = catalog.read(columns=['event_id'], start='2024-10-01 00:01', min_magnitude=5.5)
+    assert df_read['event_id'].tolist() == ['c']
@@ -0,0 +1,105 @@
+import sys
+
+import pytest
+import requests
+
+from modules.HttpClient import HttpClient, AdaptiveLimiter
+
+
+http_client_module = sys.modules['modules.HttpClient']
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    '''
+    Answers the get() calls with the given responses, raising the ones that are exceptions.
+    '''
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client_module.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def make_client(*answers, retries=3):
+    client = HttpClient(retries=retries, limiter=AdaptiveLimiter(initial=4, cooldown=0))
+    client.session = FakeSession(*answers)
+    return client
+
+
+def test_retries_5xx_until_success(sleeps):
+    client = make_client(make_response(503), make_response(502), make_response(200))
+
+    response = client.get('https://example.test/')
+
+    assert response.status_code == 200
+    assert client.session.calls == 3
+    assert len(sleeps) == 2
+    assert client.stats == {'requests': 3, 'retries': 2, 'throttled': 2}
+    assert client.limiter.in_flight == 0
+
+
+def test_honours_retry_after(sleeps):
+    client = make_client(make_response(429, {'Retry-After': '7'}), make_response(200))
+
+    assert client.get('https://example.test/').status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_returns_last_response_when_retries_run_out(sleeps):
+    client = make_client(*[make_response(503) for _ in range(3)], retries=2)
+
+    assert client.get('https://example.test/').status_code == 503
+    assert client.session.calls == 3
+
+
+def test_retries_request_exceptions_and_raises_the_last_one(sleeps):
+    client = make_client(requests.ConnectionError('refused'), requests.Timeout('slow'), retries=1)
+
+    with pytest.raises(requests.Timeout):
+        client.get('https://example.test/')
+    assert client.session.calls == 2
+    assert client.limiter.limit < 4
+
+
+def test_other_exceptions_are_not_retried_and_keep_the_limit(sleeps):
+    client = make_client(TypeError('bug'), make_response(200))
+
+    with pytest.raises(TypeError):
+        client.get('https://example.test/')
+    assert client.session.calls == 1
+    assert sleeps == []
+    assert client.limiter.limit == 4
+    assert client.limiter.in_flight == 0
+    assert client.stats['throttled'] == 0
+
+
+def test_limiter_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveLimiter(initial=4, maximum=16, cooldown=0)
+
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release()
+    assert 4.9 < limiter.limit < 5
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert 2.4 < limiter.limit < 2.5
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from modules.IntensityParser import IntensityParser
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BULLETIN = (
+    'Magnitude : Mw 6.1 Reported Intensities : Intensity IV - Gigmoto and Virac, CATANDUANES '
+    'Intensity III - Cabusao, Gainza, and Ragay, CAMARINES SUR; Barcelona and Gubat, SORSOGON '
+    '{header} Intensity IV - City of Tabaco, ALBAY; Virac, CATANDUANES Expecting Damage : NO'
+)
+
+
+def parse(text, event_id='2024_1001_2119'):
+    return list(IntensityParser().iter_rows([event_id], [text]))
+
+
+def test_reported_and_instrumental_rows():
+    rows = parse(BULLETIN.format(header='Instrumental Intensities:'))
+
+    assert rows[:2] == [
+        ('2024_1001_2119', 4, 'Gigmoto', 'Catanduanes', 'reported'),
+        ('2024_1001_2119', 4, 'Virac', 'Catanduanes', 'reported'),
+    ]
+    assert ('2024_1001_2119', 3, 'Gubat', 'Sorsogon', 'reported') in rows
+    assert [row for row in rows if row[4] == 'instrumental'] == [
+        ('2024_1001_2119', 4, 'City of Tabaco', 'Albay', 'instrumental'),
+        ('2024_1001_2119', 4, 'Virac', 'Catanduanes', 'instrumental'),
+    ]
+
+
+@pytest.mark.parametrize('header', [
+    'Instrumental Intensities:',
+    'Instrumental Intensity:',
+    'InstrumentalIntensities:',
+    'Instrumental Intensities :',
+    'INSTRUMENTAL INTENSITIES:',
+])
+def test_instrumental_header_variants(header):
+    rows = parse(BULLETIN.format(header=header))
+
+    assert sum(1 for row in rows if row[4] == 'instrumental') == 2
+    # the header must not leak into the last reported town or province
+    assert all('Instrumental' not in (row[2] + (row[3] or '')) for row in rows)
+    assert ('2024_1001_2119', 3, 'Gubat', 'Sorsogon', 'reported') in rows
+
+
+def test_recorded_bulletin():
+    with open(os.path.join(HERE, '..', 'earthquake_information.txt'), encoding='utf-8') as bulletin_file:
+        text = bulletin_file.read()
+
+    rows = parse(text)
+    assert ('2024_1001_2119', 4, 'City of Tabaco', 'Albay', 'instrumental') in rows
+    assert ('2024_1001_2119', 2, 'City of Calbayog', 'Samar', 'reported') in rows
+
+
+def test_without_intensities():
+    assert parse('Magnitude : Mw 2.1 Expecting Damage : NO') == []
+    assert parse(None) == []
+
+
+def test_parse_chunks():
+    text = BULLETIN.format(header='Instrumental Intensities:')
+    chunks = list(IntensityParser().parse(['a', 'b'], [text, text], chunksize=5))
+
+    assert sum(len(chunk) for chunk in chunks) == 2 * len(parse(text))
+    assert max(len(chunk) for chunk in chunks) == 5
+    assert list(chunks[0].columns) == IntensityParser.COLUMNS
+    assert str(chunks[0]['intensity'].dtype) == 'int16'
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from modules.LocationParser import LocationParser, parse_location
+
+
+@pytest.mark.parametrize('location, expected', [
+    ('023 km N 74° E of Cagwait (Surigao Del Sur)', (23.0, 74.0, 'Cagwait', 'Surigao Del Sur')),
+    ('010 km S 10° W of Hinatuan (Surigao Del Sur)', (10.0, 190.0, 'Hinatuan', 'Surigao Del Sur')),
+    ('004 km N 20° W of City Of Tabaco (Albay)', (4.0, 340.0, 'City Of Tabaco', 'Albay')),
+    ('012 km S 45° E of Gubat (Sorsogon)', (12.0, 135.0, 'Gubat', 'Sorsogon')),
+    ('003 km S of Virac (Catanduanes)', (3.0, 180.0, 'Virac', 'Catanduanes')),
+    ('015 km West of Bulusan (Sorsogon)', (15.0, 270.0, 'Bulusan', 'Sorsogon')),
+    ('008 km East of Gandara (Samar)', (8.0, 90.0, 'Gandara', 'Samar')),
+    ('021 km North of Daet (Camarines Norte)', (21.0, 0.0, 'Daet', 'Camarines Norte')),
+    ('002 km South of Pili (Camarines Sur)', (2.0, 180.0, 'Pili', 'Camarines Sur')),
+])
+def test_parse_location(location, expected):
+    assert parse_location(location) == expected
+
+
+@pytest.mark.parametrize('location', ['', 'Offshore', None, 'km N of (Albay)'])
+def test_unparseable_location(location):
+    assert parse_location(location) == (None, None, None, None)
+
+
+def test_parse_series():
+    locations = pd.Series(
+        ['023 km N 74° E of Cagwait (Surigao Del Sur)', '015 km West of Bulusan (Sorsogon)', 'Offshore',
+         '023 km N 74° E of Cagwait (Surigao Del Sur)'],
+        index=[10, 11, 12, 13]
+    )
+    df = LocationParser().parse(locations)
+
+    assert list(df.columns) == LocationParser.COLUMNS
+    assert df.index.tolist() == [10, 11, 12, 13]
+    assert df['ref_bearing_deg'].tolist()[:2] == [74.0, 270.0]
+    assert pd.isna(df.loc[12, 'province'])
+    assert df['province'].tolist()[-1] == 'Surigao Del Sur'
+    assert str(df['ref_distance_km'].dtype) == 'float32'
+    assert str(df['municipality'].dtype) == 'category'